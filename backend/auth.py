@@ -0,0 +1,119 @@
+"""
+Stateless admin token verification.
+
+Tokens carry the profile claims the admin routes need (`sub`, `email`, `name`)
+plus the user's token epoch (`ep`). Verifying a token is a JWT decode (memoized
+in a small LRU) and a dict lookup; there is no per-request database read.
+
+Revocation works per user: logging out bumps `token_epoch` on the admin
+document, and every token minted with an older epoch is refused. Epochs are held
+in `EpochCache`, which reloads them all from Mongo at most once per
+`refresh_interval`, so other workers honour a logout within that interval.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+import jwt
+
+from cache import TTLCache
+
+
+class TokenRejected(Exception):
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class EpochCache:
+    def __init__(self, collection, refresh_interval: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.collection = collection
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._epochs: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.refreshes = 0
+
+    async def refresh(self, max_age: Optional[float] = None) -> None:
+        """Reload every epoch, unless (with `max_age`) a load that recent finished while waiting for the lock."""
+        async with self._lock:
+            if max_age is not None and not self._older_than(max_age):
+                return
+            epochs = {}
+            async for doc in self.collection.find({}, {"_id": 0, "id": 1, "token_epoch": 1}):
+                epochs[doc["id"]] = doc.get("token_epoch", 0)
+            # A logout on this worker may have called set() after the read above; epochs only go up
+            self._epochs = {user_id: max(epoch, self._epochs.get(user_id, epoch)) for user_id, epoch in epochs.items()}
+            self._loaded_at = self._clock()
+            self.refreshes += 1
+
+    def _older_than(self, seconds: float) -> bool:
+        return self._loaded_at is None or self._clock() - self._loaded_at > seconds
+
+    async def get(self, user_id: str) -> Optional[int]:
+        """Current epoch for a user, or None if the user does not exist."""
+        if self._older_than(self.refresh_interval):
+            await self.refresh(max_age=self.refresh_interval)
+        epoch = self._epochs.get(user_id)
+        if epoch is None and self._older_than(1.0):
+            # Possibly registered on another worker since the last load
+            await self.refresh(max_age=1.0)
+            epoch = self._epochs.get(user_id)
+        return epoch
+
+    def set(self, user_id: str, epoch: int) -> None:
+        self._epochs[user_id] = epoch
+
+
+class TokenVerifier:
+    def __init__(self, secret: str, algorithm: str, epochs: EpochCache,
+                 cache_size: int = 1024, cache_ttl: float = 300.0):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.epochs = epochs
+        self._verified = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def encode(self, user_id: str, email: str, name: str, epoch: int, ttl_seconds: int = 86400) -> str:
+        now = time.time()
+        payload = {
+            "sub": user_id,
+            "email": email,
+            "name": name,
+            "ep": epoch,
+            "iat": int(now),
+            "exp": now + ttl_seconds,
+        }
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+
+    def _decode(self, token: str) -> dict:
+        found, claims = self._verified.get((token,))
+        if found:
+            if claims["exp"] <= time.time():
+                raise TokenRejected("Token expired")
+            return claims
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            raise TokenRejected("Token expired")
+        except jwt.InvalidTokenError:
+            raise TokenRejected("Invalid token")
+        if not claims.get("sub") or "name" not in claims or "ep" not in claims:
+            # Issued before profile claims were embedded; the admin has to log in again
+            raise TokenRejected("Invalid token")
+        self._verified.set((token,), claims)
+        return claims
+
+    async def verify(self, token: str) -> dict:
+        """Return the admin profile ({"id", "email", "name"}) for a valid, unrevoked token."""
+        claims = self._decode(token)
+        epoch = await self.epochs.get(claims["sub"])
+        if epoch is None:
+            raise TokenRejected("User not found")
+        if claims["ep"] < epoch:
+            raise TokenRejected("Token revoked")
+        return {"id": claims["sub"], "email": claims["email"], "name": claims["name"]}
+
+    def stats(self) -> dict:
+        return {"verified_tokens": self._verified.stats(), "epoch_refreshes": self.epochs.refreshes}
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: response serialization CPU per request, before and after the
+fast path, for GET /api/blog and GET /api/admin/contacts.
+
+"before" runs FastAPI's own response pipeline (serialize_response against the
+route's response_model, then JSONResponse). "after" is what the route serves
+now on the same documents: FastJSONResponse for /api/blog, and the streamed
+encoding (streaming.iter_page, collected into one body) for /api/admin/contacts.
+No database is involved; documents are built in memory.
+
+    python bench_serialization.py [--items 20] [--rounds 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'bench')
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import server  # noqa: E402
+from pagination import Page  # noqa: E402
+from serialization import FastJSONResponse  # noqa: E402
+from streaming import STREAM_BATCH_SIZE, iter_page  # noqa: E402
+
+
+def make_posts(n):
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "title": f"Articol despre contracte publice {i}",
+        "slug": f"articol-{i}",
+        "excerpt": "Ce trebuie să știe un antreprenor înainte de a semna un contract FIDIC. " * 2,
+        "image_url": "https://example.com/image.jpg",
+        "category": "Contracte publice",
+        "author": "B-CON Consulting",
+        "published": True,
+        "created_at": now - timedelta(days=i),
+        "updated_at": now - timedelta(days=i),
+    } for i in range(n)]
+
+
+def make_contacts(n):
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "name": "Ion Popescu",
+        "email": f"ion{i}@example.ro",
+        "phone": "+40700000000",
+        "company": "Construct SRL",
+        "message": "Bună ziua, am nevoie de consultanță pentru un contract de lucrări publice. " * 3,
+        "created_at": now - timedelta(hours=i),
+        "is_read": bool(i % 2),
+    } for i in range(n)]
+
+
+def bench(label, func, rounds):
+    for _ in range(min(rounds, 100)):
+        func()
+    start = time.process_time()
+    for _ in range(rounds):
+        func()
+    elapsed = time.process_time() - start
+    per_request_us = elapsed / rounds * 1e6
+    print(f"  {label:<8} {per_request_us:10.1f} µs/request")
+    return per_request_us
+
+
+def fast_json(loop, page):
+    return FastJSONResponse(page).body
+
+
+def streamed(loop, page):
+    docs = page["items"]
+
+    async def rest():
+        for doc in docs[STREAM_BATCH_SIZE:]:
+            yield doc
+
+    async def collect():
+        return b"".join([chunk async for chunk in iter_page(docs[:STREAM_BATCH_SIZE], rest(), len(docs))])
+
+    return loop.run_until_complete(collect())
+
+
+def run(items, rounds):
+    loop = asyncio.new_event_loop()
+    cases = [
+        ("/api/blog", Page[server.BlogPostSummary], {"items": make_posts(items), "next_cursor": None}, True,
+         fast_json),
+        ("/api/admin/contacts", Page[server.ContactMessage], {"items": make_contacts(items), "next_cursor": None},
+         False, streamed),
+    ]
+    for path, model, page, exclude_none, encode in cases:
+        field = create_response_field(name="Response_" + model.__name__, type_=model)
+
+        def before():
+            content = loop.run_until_complete(serialize_response(
+                field=field, response_content=page, exclude_none=exclude_none,
+            ))
+            return JSONResponse(content).body
+
+        def after():
+            return encode(loop, page)
+
+        assert len(before()) > 0 and len(after()) > 0
+        print(f"{path} ({items} items, after: {encode.__name__.replace('_', ' ')})")
+        slow = bench("before", before, rounds)
+        fast = bench("after", after, rounds)
+        print(f"  speedup  {slow / fast:10.1f}x")
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.items, args.rounds)
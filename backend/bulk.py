@@ -0,0 +1,93 @@
+"""
+Bulk admin operations: act on a list of ids, or on every document matching a
+filter, with one update_many / delete_many instead of one request per item.
+
+The matching ids are resolved first (one indexed query, capped at
+BULK_MAX_ITEMS) so the response can report a per-item status, then the write
+is applied to exactly that set.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+BULK_MAX_ITEMS = 1000
+
+
+class BulkFilter(BaseModel):
+    older_than_days: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def _has_criteria(self):
+        if all(value is None for value in self.model_dump().values()):
+            raise ValueError("Filter needs at least one criterion")
+        return self
+
+    def to_query(self) -> dict:
+        query = {}
+        for name, value in self.model_dump(exclude_none=True).items():
+            if name == "older_than_days":
+                query["created_at"] = {"$lt": datetime.now(timezone.utc) - timedelta(days=value)}
+            else:
+                query[name] = value
+        return query
+
+
+class BulkRequest(BaseModel):
+    action: str  # narrowed to a Literal of allowed actions by each route's subclass
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=BULK_MAX_ITEMS)
+    filter: Optional[BulkFilter] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        return self
+
+
+class BulkItemResult(BaseModel):
+    id: str
+    status: str  # "ok" or "not_found"
+
+
+class BulkResult(BaseModel):
+    action: str
+    matched: int
+    modified: int = 0
+    deleted: int = 0
+    has_more: bool = False
+    results: List[BulkItemResult]
+
+
+async def run_bulk(collection, request: BulkRequest, update: Optional[dict]) -> dict:
+    """Apply `update` (or a delete, when None) to the documents selected by `request`."""
+    if request.ids is not None:
+        requested = list(dict.fromkeys(request.ids))
+        query = {"id": {"$in": requested}}
+    else:
+        requested = None
+        query = request.filter.to_query()
+
+    found = [doc["id"] async for doc in collection.find(query, {"_id": 0, "id": 1}).limit(BULK_MAX_ITEMS)]
+    modified = deleted = 0
+    if found:
+        target = {"id": {"$in": found}}
+        if update is None:
+            deleted = (await collection.delete_many(target)).deleted_count
+        else:
+            modified = (await collection.update_many(target, update)).modified_count
+
+    found_ids = set(found)
+    return {
+        "action": request.action,
+        "matched": len(found),
+        "modified": modified,
+        "deleted": deleted,
+        # A filter can match more than one batch; call again to process the rest
+        "has_more": requested is None and len(found) == BULK_MAX_ITEMS,
+        "results": [
+            {"id": item_id, "status": "ok" if item_id in found_ids else "not_found"}
+            for item_id in (requested if requested is not None else found)
+        ],
+    }
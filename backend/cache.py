@@ -0,0 +1,92 @@
+"""
+In-process TTL + LRU cache for the public read routes.
+
+Keys are tuples whose first element is a namespace ("blog", "projects", ...).
+Admin mutations call `invalidate(namespace)` so the next public read goes back
+to Mongo. The cache is per worker: other uvicorn workers only pick up a change
+once their own entry expires, so keep the TTL short.
+
+Every namespace has a generation counter that `invalidate` bumps. A load that
+was already running when its namespace got invalidated may have read the old
+data, so its result is returned to that one caller but not stored.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 512, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._clears = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_loads = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Tuple[bool, Any]:
+        """Return (found, value). Expired entries count as misses and are dropped."""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._data[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _generation(self, namespace: Hashable) -> Tuple[int, int]:
+        return self._clears, self._generations.get(namespace, 0)
+
+    async def get_or_load(self, key: Tuple[Hashable, ...], loader: Callable[[], Awaitable[Any]]) -> Any:
+        found, value = self.get(key)
+        if found:
+            return value
+        generation = self._generation(key[0])
+        value = await loader()
+        if self._generation(key[0]) == generation:
+            self.set(key, value)
+        else:
+            # Invalidated while loading: serve this result once, but don't keep it
+            self.stale_loads += 1
+        return value
+
+    def invalidate(self, namespace: Hashable) -> None:
+        """Drop every entry in a namespace (first key element)."""
+        for key in [k for k in self._data if k[0] == namespace]:
+            del self._data[key]
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._clears += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+        }
@@ -0,0 +1,159 @@
+"""
+Write-time preprocessing for blog post content.
+
+The admin routes run `preprocess_content` whenever a post's HTML is created or
+changed, and store the results next to the post: sanitized HTML (allowlisted
+tags and attributes, headings given anchor ids), a plain-text version, word
+count, reading time and a heading outline. Public reads are plain fetches.
+"""
+
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from search import fold
+
+WORDS_PER_MINUTE = 200
+
+ALLOWED_TAGS = {
+    "p", "br", "hr", "h2", "h3", "h4", "strong", "b", "em", "i", "u", "s",
+    "a", "ul", "ol", "li", "blockquote", "code", "pre", "img", "figure", "figcaption",
+    "table", "thead", "tbody", "tr", "th", "td", "span",
+}
+ALLOWED_ATTRS = {
+    "a": {"href", "title"},
+    "img": {"src", "alt", "title", "width", "height"},
+    "th": {"colspan", "rowspan"},
+    "td": {"colspan", "rowspan"},
+}
+URL_ATTRS = {"href", "src"}
+URL_SCHEMES = ("http:", "https:", "mailto:", "tel:")
+VOID_TAGS = {"br", "hr", "img"}
+# Dropped together with everything inside them
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "noscript", "template"}
+# Authors sometimes use h1 inside the body; the page title already is the h1
+TAG_ALIASES = {"h1": "h2"}
+OUTLINE_TAGS = {"h2": 2, "h3": 3, "h4": 4}
+# Opening one of these closes a still-open sibling (<li>one<li>two)
+IMPLIED_CLOSE = {"li": {"li"}, "p": {"p"}, "tr": {"tr", "td", "th"}, "td": {"td", "th"}, "th": {"td", "th"}}
+BLOCK_TAGS = {"p", "br", "hr", "h2", "h3", "h4", "li", "blockquote", "pre", "tr", "td", "th", "figcaption", "div"}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _safe_url(value: str) -> bool:
+    url = "".join(value.split()).lower()
+    return ":" not in url.split("/", 1)[0] or url.startswith(URL_SCHEMES)
+
+
+def _anchor(text: str, taken: set) -> str:
+    base = re.sub(r"[^a-z0-9]+", "-", fold(text)).strip("-") or "sectiune"
+    anchor, n = base, 2
+    while anchor in taken:
+        anchor, n = f"{base}-{n}", n + 1
+    taken.add(anchor)
+    return anchor
+
+
+class _Preprocessor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[str] = []
+        self.text: List[str] = []
+        self.outline: List[dict] = []
+        self._open: List[str] = []
+        self._drop_depth = 0
+        self._anchors: set = set()
+        # (tag, index of its start tag in `out`, position in `text` where it starts)
+        self._heading: Optional[tuple] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self._drop_depth += 1
+            return
+        if self._drop_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(" ")
+        tag = TAG_ALIASES.get(tag, tag)
+        if tag not in ALLOWED_TAGS:
+            return
+        while self._open and self._open[-1] in IMPLIED_CLOSE.get(tag, ()):
+            self.handle_endtag(self._open[-1])
+        allowed = ALLOWED_ATTRS.get(tag, set())
+        kept = [
+            (name, value) for name, value in attrs
+            if name in allowed and value is not None and (name not in URL_ATTRS or _safe_url(value))
+        ]
+        if tag == "a" and any(name == "href" for name, _ in kept):
+            kept.append(("rel", "noopener noreferrer"))
+        rendered = "".join(f' {name}="{escape(value, quote=True)}"' for name, value in kept)
+        if tag in OUTLINE_TAGS and self._heading is None:
+            self._heading = (tag, len(self.out), len(self.text))
+        self.out.append(f"<{tag}{rendered}>")
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if TAG_ALIASES.get(tag, tag) not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self._drop_depth = max(0, self._drop_depth - 1)
+            return
+        if self._drop_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(" ")
+        tag = TAG_ALIASES.get(tag, tag)
+        if tag not in self._open:
+            return
+        # Close anything left open inside this element, so the output stays balanced
+        while self._open:
+            current = self._open.pop()
+            self.out.append(f"</{current}>")
+            if self._heading and current == self._heading[0]:
+                self._close_heading()
+            if current == tag:
+                break
+
+    def _close_heading(self):
+        tag, start_index, text_start = self._heading
+        self._heading = None
+        heading_text = " ".join("".join(self.text[text_start:]).split())
+        if not heading_text:
+            return
+        anchor = _anchor(heading_text, self._anchors)
+        self.out[start_index] = self.out[start_index].replace(f"<{tag}", f'<{tag} id="{anchor}"', 1)
+        self.outline.append({"level": OUTLINE_TAGS[tag], "text": heading_text, "anchor": anchor})
+
+    def handle_data(self, data):
+        if self._drop_depth:
+            return
+        self.out.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def finish(self):
+        self.close()
+        while self._open:
+            self.handle_endtag(self._open[-1])
+
+
+def preprocess_content(html: str) -> dict:
+    """Derived fields for a post's `content`, ready to be stored with it."""
+    parser = _Preprocessor()
+    parser.feed(html or "")
+    parser.finish()
+    text = " ".join("".join(parser.text).split())
+    word_count = len(_WORD_RE.findall(text))
+    return {
+        "content_html": "".join(parser.out),
+        "content_text": text,
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)) if word_count else 0,
+        "outline": parser.outline,
+    }
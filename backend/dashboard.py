@@ -0,0 +1,69 @@
+"""
+Counters for the admin dashboard, computed in a single aggregation.
+
+The pipeline starts on `contact_messages`, pulls in the other collections with
+`$unionWith` (each projected down to its one flag, tagged with its source), and
+splits the stream with `$facet` into one small `$group` per collection.
+Requires MongoDB 4.4+.
+"""
+
+from pydantic import BaseModel
+
+
+class DashboardCounts(BaseModel):
+    contacts_total: int = 0
+    contacts_unread: int = 0
+    posts_total: int = 0
+    posts_published: int = 0
+    posts_draft: int = 0
+    projects_total: int = 0
+    projects_featured: int = 0
+    testimonials_total: int = 0
+    testimonials_active: int = 0
+
+
+def _tag(source: str, flag: str) -> dict:
+    return {"$project": {"_id": 0, "source": {"$literal": source}, "flag": {"$eq": [f"${flag}", True]}}}
+
+
+def _count(source: str) -> list:
+    return [
+        {"$match": {"source": source}},
+        {"$group": {"_id": None, "total": {"$sum": 1}, "flagged": {"$sum": {"$cond": ["$flag", 1, 0]}}}},
+    ]
+
+
+COUNTS_PIPELINE = [
+    _tag("contacts", "is_read"),
+    {"$unionWith": {"coll": "blog_posts", "pipeline": [_tag("posts", "published")]}},
+    {"$unionWith": {"coll": "projects", "pipeline": [_tag("projects", "is_featured")]}},
+    {"$unionWith": {"coll": "testimonials", "pipeline": [_tag("testimonials", "is_active")]}},
+    {"$facet": {source: _count(source) for source in ("contacts", "posts", "projects", "testimonials")}},
+]
+
+
+def parse_counts(result: dict) -> dict:
+    def get(source):
+        rows = result.get(source) or [{}]
+        return rows[0].get("total", 0), rows[0].get("flagged", 0)
+
+    contacts_total, contacts_read = get("contacts")
+    posts_total, posts_published = get("posts")
+    projects_total, projects_featured = get("projects")
+    testimonials_total, testimonials_active = get("testimonials")
+    return {
+        "contacts_total": contacts_total,
+        "contacts_unread": contacts_total - contacts_read,
+        "posts_total": posts_total,
+        "posts_published": posts_published,
+        "posts_draft": posts_total - posts_published,
+        "projects_total": projects_total,
+        "projects_featured": projects_featured,
+        "testimonials_total": testimonials_total,
+        "testimonials_active": testimonials_active,
+    }
+
+
+async def dashboard_counts(db) -> dict:
+    rows = await db.contact_messages.aggregate(COUNTS_PIPELINE).to_list(1)
+    return parse_counts(rows[0] if rows else {})
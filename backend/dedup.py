@@ -0,0 +1,93 @@
+"""
+Deduplication of repeated submissions (double clicks, client retries).
+
+A submission is identified by up to two keys: a fingerprint of its content,
+and the client's `Idempotency-Key` header when one is sent. Before the write,
+every key is claimed in a dedup collection whose `_id` is the key. If a key is
+already taken, the submission is a repeat and the original payload stored with
+the claim is returned instead of writing again.
+
+Claims expire through a TTL index on `expires_at` (migration 9). They are also
+treated as free once `expires_at` has passed, since the TTL monitor only runs
+about once a minute.
+"""
+
+import hashlib
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from search import fold
+
+DUPLICATE_KEY = 11000
+
+
+class IdempotencyKeyReused(Exception):
+    """The Idempotency-Key was already used for a different submission."""
+
+
+def content_fingerprint(*parts: str) -> str:
+    """Hash of the parts, ignoring case, diacritics and whitespace differences."""
+    normalized = "\x1f".join(" ".join(fold(part).split()) for part in parts)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class Deduplicator:
+    def __init__(self, collection, scope: str, window: float, idempotency_ttl: float):
+        self.collection = collection
+        self.scope = scope
+        self.window = window  # seconds during which identical content counts as a repeat
+        self.idempotency_ttl = idempotency_ttl
+        self.duplicates = 0
+
+    def _claims(self, fingerprint: str, idempotency_key: Optional[str], now: datetime) -> List[dict]:
+        claims = [{"_id": f"{self.scope}:content:{fingerprint}", "kind": "content",
+                   "expires_at": now + timedelta(seconds=self.window)}]
+        if idempotency_key:
+            claims.append({"_id": f"{self.scope}:key:{idempotency_key}", "kind": "idempotency_key",
+                           "expires_at": now + timedelta(seconds=self.idempotency_ttl)})
+        return claims
+
+    async def claim(self, fingerprint: str, payload: dict, idempotency_key: Optional[str] = None) -> Optional[dict]:
+        """Claim a submission before writing it.
+
+        Returns None when it is new (go ahead and write `payload`), or the payload
+        stored by the original submission when it is a repeat.
+        """
+        now = datetime.now(timezone.utc)
+        claims = self._claims(fingerprint, idempotency_key, now)
+        ids = [claim["_id"] for claim in claims]
+        for attempt in range(2):
+            try:
+                await self.collection.insert_many(
+                    [{**claim, "fingerprint": fingerprint, "payload": payload} for claim in claims],
+                    ordered=False,
+                )
+                return None
+            except BulkWriteError as e:
+                if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                    raise
+            # Drop whatever this attempt did claim, so no key points at a payload that is never written
+            await self.release(fingerprint, payload, idempotency_key)
+            existing = await self.collection.find({"_id": {"$in": ids}, "expires_at": {"$gt": now}}).to_list(len(ids))
+            if existing:
+                return self._original(existing, fingerprint)
+            # The conflicting claims had expired but were not yet removed by the TTL monitor
+            await self.collection.delete_many({"_id": {"$in": ids}, "expires_at": {"$lte": now}})
+        return None
+
+    def _original(self, existing: List[dict], fingerprint: str) -> dict:
+        original = existing[0]
+        for doc in existing:
+            if doc["kind"] == "idempotency_key":
+                if doc["fingerprint"] != fingerprint:
+                    raise IdempotencyKeyReused()
+                original = doc
+        self.duplicates += 1
+        return original["payload"]
+
+    async def release(self, fingerprint: str, payload: dict, idempotency_key: Optional[str] = None) -> None:
+        """Free the claims made for `payload`, e.g. when writing it failed."""
+        ids = [claim["_id"] for claim in self._claims(fingerprint, idempotency_key, datetime.now(timezone.utc))]
+        await self.collection.delete_many({"_id": {"$in": ids}, "payload.id": payload["id"]})
@@ -0,0 +1,61 @@
+"""
+Streaming CSV / NDJSON export straight from a Motor cursor.
+
+Rows are encoded as documents arrive and flushed in chunks of roughly
+`CHUNK_SIZE` bytes, so memory use stays flat however many documents match.
+"""
+
+import csv
+import io
+import re
+from typing import AsyncIterator, List
+
+from pydantic_core import to_json
+
+CHUNK_SIZE = 64 * 1024
+CURSOR_BATCH_SIZE = 500
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# Phone numbers ("+40 721 123 456") and plain numbers: digits and punctuation only, nothing a
+# formula could call, so they are exported unchanged
+_PHONE_OR_NUMBER = re.compile(r"[+-]?[\d\s().\-/]+")
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    text = str(value)
+    if text.startswith(_FORMULA_PREFIXES) and not _PHONE_OR_NUMBER.fullmatch(text):
+        return "'" + text
+    return text
+
+
+async def iter_csv(cursor, fields: List[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the Romanian diacritics as UTF-8
+    buffer.write("﻿")
+    writer.writerow(fields)
+    async for doc in cursor.batch_size(CURSOR_BATCH_SIZE):
+        writer.writerow([_csv_cell(doc.get(field)) for field in fields])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def iter_ndjson(cursor) -> AsyncIterator[bytes]:
+    chunk = bytearray()
+    async for doc in cursor.batch_size(CURSOR_BATCH_SIZE):
+        chunk += to_json(doc)
+        chunk += b"\n"
+        if len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
@@ -0,0 +1,96 @@
+"""
+HTTP caching for the public content routes: strong ETags, Last-Modified,
+304 Not Modified handling and per-route Cache-Control.
+
+Responses are rendered once into a `RenderedJSON` (body bytes + ETag), which is
+what the read cache stores, so a revalidation costs a dict lookup and a string
+compare rather than a Mongo query and a serialization. Last-Modified is only
+worth sending when one timestamp covers the whole body. A list's newest
+timestamp does not change when an item is deleted, and a post's `updated_at`
+does not change when its related posts do, so those are validated by ETag
+alone.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from serialization import FastJSONResponse
+
+# Route name -> default Cache-Control. Override with CACHE_CONTROL_<NAME>, e.g.
+# CACHE_CONTROL_BLOG_POST="public, max-age=60, stale-while-revalidate=600"
+DEFAULT_CACHE_CONTROL = {
+    "blog_list": "public, max-age=60, stale-while-revalidate=600",
+    "blog_post": "public, max-age=300, stale-while-revalidate=3600",
+    "blog_popular": "public, max-age=300, stale-while-revalidate=3600",
+    "testimonials": "public, max-age=300, stale-while-revalidate=3600",
+    "projects": "public, max-age=300, stale-while-revalidate=3600",
+    "projects_featured": "public, max-age=300, stale-while-revalidate=3600",
+    "home": "public, max-age=60, stale-while-revalidate=600",
+}
+
+
+def cache_control_for(name: str) -> str:
+    return os.environ.get(f"CACHE_CONTROL_{name.upper()}", DEFAULT_CACHE_CONTROL[name])
+
+
+@dataclass(frozen=True)
+class RenderedJSON:
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+def render_json(content, last_modified: Optional[datetime] = None) -> RenderedJSON:
+    body = FastJSONResponse(content).body
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return RenderedJSON(body=body, etag=etag, last_modified=last_modified)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(request: Request, rendered: RenderedJSON, cache_control: str) -> Response:
+    """200 with validators, or 304 if the client's copy is still current."""
+    headers = {"ETag": rendered.etag, "Cache-Control": cache_control}
+    if rendered.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(rendered.last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        if _etag_matches(if_none_match, rendered.etag):
+            return Response(status_code=304, headers=headers)
+    elif rendered.last_modified is not None:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and _not_modified_since(if_modified_since, rendered.last_modified):
+            return Response(status_code=304, headers=headers)
+
+    return FastJSONResponse(rendered.body, headers=headers)
@@ -0,0 +1,164 @@
+"""
+Request metrics and Prometheus text rendering.
+
+`MetricsMiddleware` records, per (method, route template), the request count,
+5xx errors and a latency histogram. Routes are labelled by their template
+(`/api/blog/{slug}`), never the raw path, so label cardinality stays bounded.
+Requests that matched no route share the `<unmatched>` label.
+
+Recording happens on the event loop with no await in between, so plain
+counters are safe without locks: an observation is a dict lookup, a bisect
+and three increments.
+"""
+
+import bisect
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds; the implicit last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets, interpolating linearly inside the bucket that holds the rank."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            total += n
+            yield ("+Inf" if bound == math.inf else repr(bound)), total
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_histogram(name: str, help_text: str, series: Dict[Tuple, Histogram], label_names: Tuple[str, ...]) -> List[str]:
+    """Prometheus histogram plus a `<name>_quantile` gauge (p50/p95/p99 estimated from the buckets)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, hist in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        for le, total in hist.cumulative():
+            lines.append(f"{name}_bucket{_labels(**labels, le=le)} {total}")
+        lines.append(f"{name}_sum{_labels(**labels)} {_number(hist.sum)}")
+        lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+    lines += [f"# HELP {name}_quantile {help_text} (estimated quantiles)", f"# TYPE {name}_quantile gauge"]
+    for key, hist in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        for q in QUANTILES:
+            lines.append(f"{name}_quantile{_labels(**labels, quantile=q)} {_number(hist.quantile(q))}")
+    return lines
+
+
+def render_counter(name: str, help_text: str, series: Dict[Tuple, float], label_names: Tuple[str, ...],
+                   kind: str = "counter") -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for key, value in sorted(series.items()):
+        lines.append(f"{name}{_labels(**dict(zip(label_names, key)))} {_number(value)}")
+    return lines
+
+
+def render_gauge(name: str, help_text: str, value: float) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, duration: float) -> None:
+        key = (method, route)
+        hist = self.latency.get(key)
+        if hist is None:
+            hist = self.latency[key] = Histogram()
+            self.errors[key] = 0
+        hist.observe(duration)
+        if status >= 500:
+            self.errors[key] += 1
+
+    def render(self) -> List[str]:
+        labels = ("method", "route")
+        return (
+            render_counter("http_requests_total", "HTTP requests by route template",
+                           {k: h.count for k, h in self.latency.items()}, labels)
+            + render_counter("http_request_errors_total", "HTTP requests answered with a 5xx status",
+                             self.errors, labels)
+            + render_histogram("http_request_duration_seconds", "HTTP request latency", self.latency, labels)
+            + render_gauge("http_requests_in_flight", "HTTP requests currently being handled", self.in_flight)
+        )
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            # Routing stores the matched route in the scope; its template is the label
+            route: Optional[object] = scope.get("route")
+            metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,348 @@
+"""
+Versioned index / data migrations for the B-CON MongoDB database.
+
+Migrations run once per database. Applied versions are recorded in the
+`_migrations` collection; a worker claims a version by inserting its document,
+so several uvicorn workers booting at once never build the same index twice.
+While it applies the migration the worker refreshes `heartbeat_at` on the
+claim; a claim whose heartbeat has stopped belongs to a crashed worker and is
+taken over, however long the migration itself takes.
+
+Runs automatically on startup (see server.py) or manually:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list applied versions
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from content import preprocess_content
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "_migrations"
+
+# The applying worker refreshes its claim this often; a claim whose last heartbeat
+# is older than STALE_CLAIM_AFTER is considered abandoned (worker crashed mid-build)
+HEARTBEAT_INTERVAL = timedelta(seconds=15)
+STALE_CLAIM_AFTER = timedelta(minutes=1)
+WAIT_POLL_SECONDS = 0.5
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[..., Awaitable[None]]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a migration function under a unique, increasing version."""
+    def decorator(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+# ==================== MIGRATIONS ====================
+
+@migration(1, "Initial indexes for all collections")
+async def initial_indexes(db):
+    await db.blog_posts.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("slug", ASCENDING)], unique=True, name="slug_unique"),
+        # get_published_posts: {"published": True} sorted by created_at desc
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING)], name="published_created_at"),
+        # admin_get_all_posts: everything sorted by created_at desc
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ])
+    await db.contact_messages.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ])
+    await db.admin_users.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ])
+    await db.testimonials.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("is_active", ASCENDING)], name="is_active"),
+    ])
+    await db.projects.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        IndexModel([("is_featured", ASCENDING)], name="is_featured"),
+    ])
+
+
+TIMESTAMP_FIELDS = {
+    "blog_posts": ["created_at", "updated_at"],
+    "contact_messages": ["created_at"],
+    "admin_users": ["created_at"],
+    "testimonials": ["created_at"],
+    "projects": ["created_at"],
+}
+CONVERT_BATCH_SIZE = 500
+
+
+@migration(2, "Convert ISO-8601 string timestamps to BSON dates")
+async def string_timestamps_to_dates(db):
+    for collection_name, fields in TIMESTAMP_FIELDS.items():
+        collection = db[collection_name]
+        query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        projection = {field: 1 for field in fields}
+        ops = []
+        converted = 0
+        async for doc in collection.find(query, projection):
+            update = {
+                field: datetime.fromisoformat(doc[field])
+                for field in fields
+                if isinstance(doc.get(field), str)
+            }
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+            if len(ops) >= CONVERT_BATCH_SIZE:
+                await collection.bulk_write(ops, ordered=False)
+                converted += len(ops)
+                ops = []
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+            converted += len(ops)
+        if converted:
+            logger.info(f"Converted timestamps on {converted} {collection_name} documents")
+
+
+@migration(3, "Keyset pagination indexes on (created_at, id)")
+async def keyset_pagination_indexes(db):
+    await db.blog_posts.create_indexes([
+        IndexModel([("published", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="published_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+    ])
+    for collection_name in ("contact_messages", "testimonials", "projects"):
+        await db[collection_name].create_index(
+            [("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"
+        )
+    # Superseded by the compound indexes above (they share the same prefix)
+    for collection_name, index_name in (
+        ("blog_posts", "published_created_at"),
+        ("blog_posts", "created_at"),
+        ("contact_messages", "created_at"),
+        ("projects", "created_at"),
+    ):
+        try:
+            await db[collection_name].drop_index(index_name)
+        except OperationFailure:
+            pass
+
+
+@migration(4, "Email outbox indexes")
+async def email_outbox_indexes(db):
+    await db.email_outbox.create_indexes([
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Worker claim: due pending messages, and sending messages with an expired lease
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt_at"),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)], name="status_locked_until"),
+    ])
+
+
+@migration(5, "Contact read-state index for bulk operations and filtered listings")
+async def contact_read_state_index(db):
+    # {"is_read": ..., "created_at": {"$lt"/"$gte": ...}} filters
+    await db.contact_messages.create_index(
+        [("is_read", ASCENDING), ("created_at", DESCENDING)], name="is_read_created_at"
+    )
+
+
+@migration(6, "Preprocess blog post content (sanitized HTML, plain text, reading time, outline)")
+async def preprocess_blog_content(db):
+    ops = []
+    processed = 0
+    async for doc in db.blog_posts.find({"content_html": {"$exists": False}}, {"_id": 1, "content": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": preprocess_content(doc.get("content", ""))}))
+        if len(ops) >= CONVERT_BATCH_SIZE:
+            await db.blog_posts.bulk_write(ops, ordered=False)
+            processed += len(ops)
+            ops = []
+    if ops:
+        await db.blog_posts.bulk_write(ops, ordered=False)
+        processed += len(ops)
+    if processed:
+        logger.info(f"Preprocessed content of {processed} blog posts")
+
+
+@migration(7, "Blog popularity index on view_count")
+async def blog_popularity_index(db):
+    # /api/blog/popular: published posts by view_count (the flush itself goes through slug_unique)
+    await db.blog_posts.create_index(
+        [("published", ASCENDING), ("view_count", DESCENDING), ("id", DESCENDING)],
+        name="published_view_count_id",
+    )
+
+
+@migration(8, "TTL index for the shared rate limit buckets")
+async def rate_limit_ttl_index(db):
+    # A bucket expires once it would have refilled completely (see ratelimit.MongoBackend)
+    await db.rate_limits.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+
+
+@migration(9, "TTL index for submission dedup claims")
+async def submission_dedup_ttl_index(db):
+    # Claims are keyed by _id; each carries its own expiry (see dedup.Deduplicator)
+    await db.submission_dedup.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+
+
+@migration(10, "Pending contact notification index")
+async def contact_notification_index(db):
+    # Outbox sweep: {"notification.status": "pending"}; partial, so handled messages take no space
+    await db.contact_messages.create_index(
+        "notification.status",
+        partialFilterExpression={"notification.status": "pending"},
+        name="notification_pending",
+    )
+
+
+# ==================== RUNNER ====================
+
+async def _claim(collection, m: Migration, owner: str) -> bool:
+    """Try to take ownership of a migration. Returns False if it is already applied."""
+    while True:
+        now = datetime.now(timezone.utc)
+        try:
+            await collection.insert_one({
+                "_id": m.version,
+                "description": m.description,
+                "status": "running",
+                "owner": owner,
+                "started_at": now,
+                "heartbeat_at": now,
+            })
+            return True
+        except DuplicateKeyError:
+            pass
+
+        existing = await collection.find_one({"_id": m.version})
+        if existing is None:
+            continue  # released between our insert and read, try again
+        if existing.get("status") == "applied":
+            return False
+
+        # Claims written before heartbeats existed only have started_at
+        heartbeat_at = existing.get("heartbeat_at", existing.get("started_at"))
+        if heartbeat_at is not None and heartbeat_at.tzinfo is None:
+            heartbeat_at = heartbeat_at.replace(tzinfo=timezone.utc)
+        if heartbeat_at is None or now - heartbeat_at > STALE_CLAIM_AFTER:
+            # Take over an abandoned claim, guarded on its owner so two waiters can't both win
+            result = await collection.update_one(
+                {"_id": m.version, "status": "running", "owner": existing.get("owner")},
+                {"$set": {"owner": owner, "started_at": now, "heartbeat_at": now}},
+            )
+            if result.modified_count == 1:
+                logger.warning(f"Taking over stale claim for migration {m.version}")
+                return True
+
+        # Another worker is applying it right now; wait for it to finish
+        await asyncio.sleep(WAIT_POLL_SECONDS)
+
+
+async def _heartbeat(collection, m: Migration, owner: str) -> None:
+    """Keep refreshing the claim on `m` until cancelled."""
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL.total_seconds())
+        try:
+            result = await collection.update_one(
+                {"_id": m.version, "status": "running", "owner": owner},
+                {"$set": {"heartbeat_at": datetime.now(timezone.utc)}},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to refresh claim for migration {m.version}: {str(e)}")
+            continue
+        if result.modified_count == 0:
+            logger.error(f"Lost claim for migration {m.version} to another worker")
+            return
+
+
+async def run_migrations(db) -> List[int]:
+    """Apply all pending migrations in order. Returns the versions applied by this call."""
+    collection = db[MIGRATIONS_COLLECTION]
+    owner = str(uuid.uuid4())
+    applied = []
+    for m in MIGRATIONS:
+        if not await _claim(collection, m, owner):
+            continue
+        logger.info(f"Applying migration {m.version}: {m.description}")
+        heartbeat = asyncio.create_task(_heartbeat(collection, m, owner))
+        try:
+            await m.apply(db)
+        except Exception:
+            # Release the claim so the next boot (or the CLI) can retry
+            await collection.delete_one({"_id": m.version, "status": "running", "owner": owner})
+            raise
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        await collection.update_one(
+            {"_id": m.version, "owner": owner},
+            {"$set": {"status": "applied", "applied_at": datetime.now(timezone.utc)}},
+        )
+        applied.append(m.version)
+    return applied
+
+
+async def migration_status(db) -> List[dict]:
+    docs = await db[MIGRATIONS_COLLECTION].find({}).sort("_id", 1).to_list(None)
+    return docs
+
+
+def _main(argv: List[str]) -> int:
+    from bson.codec_options import CodecOptions
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client.get_database(
+        os.environ['DB_NAME'],
+        codec_options=CodecOptions(tz_aware=True, tzinfo=timezone.utc),
+    )
+
+    async def run():
+        if "--status" in argv:
+            docs = await migration_status(db)
+            known = {d["_id"]: d for d in docs}
+            for m in MIGRATIONS:
+                status = known.get(m.version, {}).get("status", "pending")
+                print(f"{m.version:>4}  {status:<8}  {m.description}")
+            return 0
+        applied = await run_migrations(db)
+        print(f"Applied migrations: {applied or 'none'}")
+        return 0
+
+    try:
+        return asyncio.run(run())
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,247 @@
+"""
+MongoDB driver monitoring, registered on the Motor client through
+`event_listeners` (see server.py).
+
+`PoolMonitor` follows the connection pool (CMAP) events: connections open and
+checked out, checkout failures and pool clears, summed over all servers. The
+listener callbacks run synchronously on the driver's threads and only bump
+integers.
+
+`CommandMonitor` times every command by collection and operation. It logs the
+commands slower than a threshold together with the shape of their filter
+(values replaced by "?"), which is usually enough to spot a missing index. It
+also adds each command's duration to the current request's `RequestDbTime`.
+Motor runs the driver in a thread pool but copies the caller's context into
+it, so the listener sees the request's context variable.
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from metrics import LATENCY_BUCKETS, UNMATCHED_ROUTE, Histogram, render_counter, render_gauge, render_histogram
+
+logger = logging.getLogger(__name__)
+
+# Most commands finish well under a millisecond, so add finer buckets at the bottom
+DB_BUCKETS = (0.0001, 0.00025, 0.0005) + LATENCY_BUCKETS
+# Connection handshake / auth / session housekeeping, not application queries
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions",
+                    "buildInfo", "getnonce", "authenticate"}
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.created = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def stats(self) -> dict:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "created": self.created,
+            "checkout_failures": self.checkout_failures,
+            "pool_clears": self.pool_clears,
+        }
+
+    def render(self) -> List[str]:
+        return (
+            render_gauge("mongodb_pool_connections_open", "Open connections to MongoDB", self.open)
+            + render_gauge("mongodb_pool_connections_checked_out", "Connections currently in use", self.checked_out)
+            + render_counter("mongodb_pool_events_total", "Connection pool events",
+                             {("created",): self.created, ("checkout_failed",): self.checkout_failures,
+                              ("pool_cleared",): self.pool_clears}, ("event",))
+        )
+
+
+@dataclass
+class RequestDbTime:
+    """DB time spent on behalf of one HTTP request (driver threads add to it)."""
+    seconds: float = 0.0
+    commands: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.seconds += seconds
+            self.commands += 1
+
+
+request_db_time: contextvars.ContextVar[Optional[RequestDbTime]] = contextvars.ContextVar(
+    "request_db_time", default=None
+)
+
+
+def query_shape(value):
+    """The structure of a filter with its values blanked: {"slug": "?", "created_at": {"$lt": "?"}}."""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return [query_shape(v) for v in value]
+    return "?"
+
+
+def _collection(command_name: str, command) -> str:
+    name = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return name if isinstance(name, str) else "-"
+
+
+def _filter(command_name: str, command):
+    if command_name == "find":
+        return command.get("filter")
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query")
+    if command_name in ("update", "delete"):
+        statements = command.get(command_name + "s") or []
+        return statements[0].get("q") if statements else None
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        return pipeline[0].get("$match") if pipeline else None
+    return None
+
+
+class CommandMonitor(monitoring.CommandListener):
+    def __init__(self, slow_threshold_ms: float = 100.0):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple[int, object], Tuple[str, str, object]] = {}
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self.slow_commands = 0
+        # Per (method, route template), fed by RequestDbTimeMiddleware on the event loop
+        self.request_db_time: Dict[Tuple[str, str], Histogram] = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        entry = (event.command_name, _collection(event.command_name, event.command), event.command)
+        with self._lock:
+            self._started[(event.request_id, event.connection_id)] = entry
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed: bool) -> None:
+        with self._lock:
+            entry = self._started.pop((event.request_id, event.connection_id), None)
+            if entry is None:
+                return
+            command_name, collection, command = entry
+            seconds = event.duration_micros / 1_000_000
+            key = (collection, command_name)
+            hist = self.durations.get(key)
+            if hist is None:
+                hist = self.durations[key] = Histogram(DB_BUCKETS)
+                self.failures[key] = 0
+            hist.observe(seconds)
+            if failed:
+                self.failures[key] += 1
+            slow = seconds >= self.slow_threshold
+            if slow:
+                self.slow_commands += 1
+
+        timer = request_db_time.get()
+        if timer is not None:
+            timer.add(seconds)
+        if slow:
+            shape = query_shape(_filter(command_name, command) or {})
+            sort = command.get("sort") if command_name == "find" else None
+            logger.warning(
+                f"Slow MongoDB {command_name} on {collection}: {seconds * 1000:.1f} ms, "
+                f"filter {json.dumps(shape, sort_keys=True)}"
+                + (f", sort {json.dumps(dict(sort))}" if sort else "")
+            )
+
+    def render(self) -> List[str]:
+        with self._lock:
+            durations = {k: h for k, h in self.durations.items()}
+            failures = dict(self.failures)
+        labels = ("collection", "command")
+        return (
+            render_histogram("mongodb_command_duration_seconds", "MongoDB command latency", durations, labels)
+            + render_counter("mongodb_command_failures_total", "MongoDB commands that failed", failures, labels)
+            + render_counter("mongodb_slow_commands_total", "MongoDB commands over the slow query threshold",
+                             {(): self.slow_commands}, ())
+            + render_histogram("http_request_db_duration_seconds", "MongoDB time per HTTP request",
+                               self.request_db_time, ("method", "route"))
+        )
+
+    def observe_request(self, method: str, route: str, seconds: float) -> None:
+        key = (method, route)
+        hist = self.request_db_time.get(key)
+        if hist is None:
+            hist = self.request_db_time[key] = Histogram(DB_BUCKETS)
+        hist.observe(seconds)
+
+
+class RequestDbTimeMiddleware:
+    """Gives each request a `RequestDbTime`, then records its total per route template and logs heavy requests."""
+
+    def __init__(self, app, monitor: CommandMonitor, slow_request_ms: float = 250.0):
+        self.app = app
+        self.monitor = monitor
+        self.slow_request = slow_request_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timer = RequestDbTime()
+        token = request_db_time.set(timer)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_db_time.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            self.monitor.observe_request(scope["method"], route, timer.seconds)
+            if timer.seconds >= self.slow_request:
+                logger.warning(
+                    f"{scope['method']} {route} spent {timer.seconds * 1000:.1f} ms in {timer.commands} "
+                    f"MongoDB commands ({(time.perf_counter() - start) * 1000:.1f} ms total)"
+                )
@@ -0,0 +1,262 @@
+"""
+Durable email outbox.
+
+Request handlers enqueue a message document in `email_outbox` and return right
+away; `EmailOutbox` drains the collection in the background with bounded
+concurrency.
+
+A handler that stores a document and wants a notification for it should not
+make that two writes (the second can fail after the first succeeded). Instead
+it stores the document with `notification: {"status": "pending"}` and the
+collection is registered with `watch()`: the worker moves each pending
+notification into the outbox, keyed by the source document so it is queued
+exactly once, and then marks it `queued`. A failed send is retried with exponential backoff, and after
+`max_attempts` the message is parked in the `dead` state for inspection.
+
+Claims are taken with an atomic find_one_and_update plus a lease, so several
+uvicorn workers can drain the same outbox, and a message held by a crashed
+worker is picked up again once its lease expires.
+
+Transports are pluggable: anything with `async def send(message: dict)`.
+"""
+
+import asyncio
+import contextvars
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Callable, List, Optional, Protocol
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+# `notification.status` on a watched document once its message is in the outbox
+QUEUED = "queued"
+
+
+class EmailTransport(Protocol):
+    async def send(self, message: dict) -> None:
+        """Deliver one message ({"from", "to", "subject", "html"}). Raise on failure."""
+        ...
+
+
+class ResendTransport:
+    def __init__(self, resend_module):
+        self._resend = resend_module
+
+    async def send(self, message: dict) -> None:
+        # The Resend SDK is synchronous; keep it off the event loop
+        await asyncio.to_thread(self._resend.Emails.send, message)
+
+
+class FakeTransport:
+    """Records messages instead of sending them; set `fail_times` to simulate outages."""
+
+    def __init__(self, fail_times: int = 0):
+        self.sent: List[dict] = []
+        self.fail_times = fail_times
+
+    async def send(self, message: dict) -> None:
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("Simulated transport failure")
+        self.sent.append(message)
+
+
+class EmailOutbox:
+    def __init__(self, collection, transport: EmailTransport, concurrency: int = 4,
+                 max_attempts: int = 8, base_delay: float = 5.0, max_delay: float = 3600.0,
+                 lease: float = 120.0, poll_interval: float = 5.0, shutdown_timeout: float = 30.0):
+        self.collection = collection
+        self.transport = transport
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = timedelta(seconds=lease)
+        self.poll_interval = poll_interval
+        self.shutdown_timeout = shutdown_timeout
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: set = set()
+        self._sources: List[tuple] = []
+
+    # ---------- producer side ----------
+
+    def new_message(self, message: dict, **metadata) -> dict:
+        now = datetime.now(timezone.utc)
+        return {
+            "id": str(uuid.uuid4()),
+            "status": PENDING,
+            "message": message,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+            **metadata,
+        }
+
+    async def enqueue(self, message: dict, **metadata) -> dict:
+        doc = self.new_message(message, **metadata)
+        await self.collection.insert_one(doc)
+        self._wakeup.set()
+        return doc
+
+    def watch(self, collection, build_message: Callable[[dict], dict], id_field: str) -> None:
+        """Queue `build_message(doc)` for every `doc` in `collection` with a pending notification.
+
+        The queued message records the source document's id under `id_field`.
+        """
+        self._sources.append((collection, build_message, id_field))
+
+    def wake(self) -> None:
+        """Run the worker now instead of at the next poll, e.g. after storing a pending notification."""
+        self._wakeup.set()
+
+    async def sweep(self) -> int:
+        """Move pending notifications from the watched collections into the outbox. Returns how many were queued."""
+        queued = 0
+        for collection, build_message, id_field in self._sources:
+            async for source in collection.find({"notification.status": PENDING}):
+                doc = self.new_message(build_message(source), **{id_field: source["id"]})
+                # Keyed by the source, so a sweep interrupted before the update below (or one running
+                # on another worker at the same time) does not queue the message twice
+                doc["_id"] = f"{id_field}:{source['id']}"
+                try:
+                    await self.collection.insert_one(doc)
+                    queued += 1
+                except DuplicateKeyError:
+                    pass
+                await collection.update_one(
+                    {"id": source["id"]},
+                    {"$set": {"notification.status": QUEUED, "notification.queued_at": doc["created_at"]}},
+                )
+        return queued
+
+    async def depth(self) -> int:
+        """Messages still waiting to be delivered."""
+        return await self.collection.count_documents({"status": {"$in": [PENDING, SENDING]}})
+
+    async def stats(self) -> dict:
+        counts = {PENDING: 0, SENDING: 0, SENT: 0, DEAD: 0}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+    # ---------- worker side ----------
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Not cancelled: that would cancel the sends in flight, and a Resend call already running
+        # in its thread still goes out but is never marked sent, so it is sent again after the lease
+        self._stopping.set()
+        self._wakeup.set()
+        done, _ = await asyncio.wait({self._task}, timeout=self.shutdown_timeout)
+        if not done:
+            logger.warning(f"Email outbox still sending after {self.shutdown_timeout:.0f}s, cancelling")
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._in_flight, return_exceptions=True)
+        self._task = None
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": SENDING, "locked_until": {"$lte": now}},
+            ]},
+            {"$set": {"status": SENDING, "locked_until": now + self.lease, "updated_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+
+    async def _deliver(self, doc: dict) -> None:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.transport.send(doc["message"])
+        except Exception as e:
+            if doc["attempts"] >= self.max_attempts:
+                logger.error(f"Email {doc['id']} moved to dead letter after {doc['attempts']} attempts: {str(e)}")
+                update = {"status": DEAD, "last_error": str(e), "locked_until": None, "updated_at": now}
+            else:
+                delay = self._backoff(doc["attempts"])
+                logger.warning(f"Email {doc['id']} failed (attempt {doc['attempts']}), retrying in {delay:.0f}s: {str(e)}")
+                update = {
+                    "status": PENDING,
+                    "last_error": str(e),
+                    "locked_until": None,
+                    "next_attempt_at": now + timedelta(seconds=delay),
+                    "updated_at": now,
+                }
+        else:
+            logger.info(f"Email {doc['id']} sent")
+            update = {"status": SENT, "sent_at": now, "locked_until": None, "updated_at": now}
+        await self.collection.update_one({"id": doc["id"]}, {"$set": update})
+
+    async def drain(self) -> int:
+        """Deliver every message that is due, at most `concurrency` at a time. Returns how many were attempted."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        attempted = 0
+
+        async def deliver(doc):
+            try:
+                await self._deliver(doc)
+            finally:
+                semaphore.release()
+
+        # On shutdown nothing new is claimed; the sends already started are waited for below
+        while not self._stopping.is_set():
+            await semaphore.acquire()
+            doc = None if self._stopping.is_set() else await self._claim()
+            if doc is None:
+                semaphore.release()
+                break
+            attempted += 1
+            task = asyncio.create_task(deliver(doc))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        return attempted
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            # Clear before draining so an enqueue during the drain is not missed
+            self._wakeup.clear()
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Still pending on the source documents; the next pass picks them up
+                logger.error(f"Email outbox sweep failed: {str(e)}")
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,73 @@
+"""
+Keyset (cursor) pagination over `(created_at, id)`.
+
+Lists are ordered newest first by `created_at`, with `id` as a tie breaker.
+The cursor handed to clients is an opaque base64 token holding the sort key of
+the last item on the page, so fetching the next page is an indexed range scan
+starting right after it, whatever the page depth.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+SORT = [("created_at", -1), ("id", -1)]
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps({"t": doc["created_at"].isoformat(), "i": doc["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), str(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_query(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict `query` to the documents that sort after `cursor`."""
+    if not cursor:
+        return query
+    created_at, last_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": last_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+def page_cursor(collection, query: dict, limit: int, cursor: Optional[str] = None,
+                projection: Optional[dict] = None):
+    """Motor cursor over one page plus one extra document, which tells us whether there is a next page."""
+    if projection is None:
+        projection = {"_id": 0}
+    return collection.find(keyset_query(query, cursor), projection).sort(SORT).limit(limit + 1)
+
+
+async def paginate(collection, query: dict, limit: int, cursor: Optional[str] = None,
+                   projection: Optional[dict] = None) -> dict:
+    """Fetch one page. Returns a dict matching `Page`."""
+    docs = await page_cursor(collection, query, limit, cursor, projection).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+    return {"items": docs, "next_cursor": next_cursor}
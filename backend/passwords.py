@@ -0,0 +1,96 @@
+"""
+bcrypt hashing and verification off the event loop.
+
+bcrypt is deliberately slow (~200 ms at cost 12) and releases the GIL while it
+works, so calls run in a small dedicated thread pool. A semaphore caps how many
+run at once, and when more than `max_queue` callers are already waiting new
+calls fail fast with `PasswordPoolBusy` instead of piling up behind a flood of
+login attempts.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+def hash_cost(password_hash: str) -> Optional[int]:
+    """Cost factor encoded in a bcrypt hash ("$2b$12$..." -> 12)."""
+    try:
+        return int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = 12, max_concurrency: int = 2, max_queue: int = 32):
+        self.rounds = rounds
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bcrypt")
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.total_seconds += time.perf_counter() - start
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        def work():
+            return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=self.rounds)).decode()
+        return await self._run(work)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        def work():
+            return bcrypt.checkpw(password.encode(), password_hash.encode())
+        return await self._run(work)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return hash_cost(password_hash) != self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._semaphore = None
@@ -0,0 +1,150 @@
+"""
+Token-bucket rate limiting for abuse-prone routes (/contact, /admin/login).
+
+Each (route, client IP) pair gets a bucket of `burst` tokens refilled at
+`burst / period` tokens per second; a request takes one token or gets a 429
+with Retry-After. Two backends:
+
+- MemoryBackend: per-worker buckets in an LRU-bounded dict. No I/O, so an
+  allowed request costs a dict lookup and a little arithmetic.
+- MongoBackend: one document per bucket, updated atomically with a pipeline
+  `find_one_and_update`, so all workers share the limit. A TTL index
+  (migration 8) removes buckets once they would be full again.
+
+The middleware is plain ASGI (no BaseHTTPMiddleware), and only requests to a
+limited route reach the backend.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    burst: int
+    period: float  # seconds to refill a drained bucket
+
+    @property
+    def rate(self) -> float:
+        return self.burst / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimitRule":
+        """`"5/600"` -> 5 requests, refilled over 600 seconds."""
+        burst, period = spec.split("/")
+        return cls(int(burst), float(period))
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rule: RateLimitRule) -> Tuple[bool, float]:
+        """Take a token. Returns (allowed, seconds until the next token when refused)."""
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (rule.burst, now))
+        tokens = min(rule.burst, tokens + (now - updated) * rule.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            # Least recently seen client; its bucket would most likely be full by now anyway
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rule.rate
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
+class MongoBackend:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def _pipeline(self, rule: RateLimitRule, now: datetime) -> list:
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [rule.burst, {"$add": [{"$ifNull": ["$tokens", rule.burst]},
+                                                    {"$multiply": [elapsed, rule.rate]}]}]}
+        return [
+            {"$set": {"tokens": refilled}},
+            {"$set": {
+                "allowed": {"$gte": ["$tokens", 1]},
+                "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "updated_at": now,
+                "expires_at": now + timedelta(seconds=rule.period),
+            }},
+        ]
+
+    async def take(self, key: str, rule: RateLimitRule) -> Tuple[bool, float]:
+        now = datetime.now(timezone.utc)
+        for attempt in range(2):
+            try:
+                doc = await self.collection.find_one_and_update(
+                    {"_id": key},
+                    self._pipeline(rule, now),
+                    projection={"tokens": 1, "allowed": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                # Two workers created the same bucket at once; the retry updates the winner's document
+                if attempt:
+                    raise
+        allowed = doc["allowed"]
+        return allowed, 0.0 if allowed else (1 - doc["tokens"]) / rule.rate
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, backend, rules: Dict[Tuple[str, str], RateLimitRule],
+                 trust_forwarded_for: bool = False):
+        self.app = app
+        self.backend = backend
+        self.rules = rules
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    # Rightmost entry: added by our own proxy, so the client cannot spoof it
+                    return value.decode("latin-1").rsplit(",", 1)[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rule: Optional[RateLimitRule] = self.rules.get((scope["method"], scope["path"]))
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        key = f"{scope['path']}|{self._client_ip(scope)}"
+        try:
+            allowed, retry_after = await self.backend.take(key, rule)
+        except Exception as e:
+            # Fail open: a limiter outage should not take the contact form down with it
+            logger.error(f"Rate limiter unavailable, allowing request: {str(e)}")
+            allowed, retry_after = True, 0.0
+        if allowed:
+            return await self.app(scope, receive, send)
+
+        response = JSONResponse(
+            {"detail": "Too many requests, please try again later"},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
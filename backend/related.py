@@ -0,0 +1,130 @@
+"""
+Precomputed "related articles" for blog posts.
+
+A background job scores every pair of published posts by TF-IDF cosine
+similarity (title, category, excerpt and plain-text content, weighted like the
+search index) and stores the top-k related slugs on each post as `related`.
+The public post route then only needs one `$in` lookup to render them.
+
+The admin blog routes call `trigger()` after every change. Triggers that
+arrive while a run is in progress are coalesced into a single follow-up run.
+"""
+
+import asyncio
+import contextvars
+import logging
+import math
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from search import FIELD_WEIGHTS, tokenize
+
+logger = logging.getLogger(__name__)
+
+RELATED_PROJECTION = {"_id": 0, "id": 1, "slug": 1, "title": 1, "category": 1, "excerpt": 1,
+                      "content_text": 1, "related": 1}
+# Pairs less similar than this are not worth recommending
+MIN_SIMILARITY = 0.05
+
+
+def _vector(post: dict) -> Dict[str, float]:
+    weighted: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        text = post.get("content_text" if field == "content" else field) or ""
+        for token in tokenize(text):
+            weighted[token] += weight
+    # Sublinear tf so long posts don't drown everything else in one repeated word
+    return {term: 1 + math.log(tf) for term, tf in weighted.items()}
+
+
+def compute_related(posts: List[dict], k: int) -> Dict[str, List[str]]:
+    """Map each post id to the slugs of its `k` most similar posts, best first."""
+    vectors = {post["id"]: _vector(post) for post in posts}
+    n_docs = len(vectors)
+    df: Counter = Counter(term for vector in vectors.values() for term in vector)
+
+    postings: Dict[str, List[tuple]] = defaultdict(list)
+    for doc_id, vector in vectors.items():
+        weights = {t: tf * math.log(n_docs / df[t]) for t, tf in vector.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if not norm:
+            continue
+        for term, w in weights.items():
+            if w:
+                postings[term].append((doc_id, w / norm))
+
+    # Cosine similarity accumulated term by term: only pairs sharing a term are visited
+    scores: Dict[str, Counter] = defaultdict(Counter)
+    for entries in postings.values():
+        for i, (a, wa) in enumerate(entries):
+            for b, wb in entries[i + 1:]:
+                scores[a][b] += wa * wb
+                scores[b][a] += wa * wb
+
+    slugs = {post["id"]: post["slug"] for post in posts}
+    return {
+        doc_id: [
+            slugs[other] for other, score in sorted(scores[doc_id].items(), key=lambda item: (-item[1], slugs[item[0]]))
+            if score >= MIN_SIMILARITY
+        ][:k]
+        for doc_id in vectors
+    }
+
+
+class RelatedPostsJob:
+    def __init__(self, collection, k: int = 3, on_updated: Optional[Callable[[], None]] = None):
+        self.collection = collection
+        self.k = k
+        self.on_updated = on_updated
+        self._task: Optional[asyncio.Task] = None
+        self._rerun = False
+        self.runs = 0
+        self.last_updated = 0
+
+    def trigger(self) -> None:
+        """Schedule a recompute in the background (no-op beyond a flag if one is already running)."""
+        if self._task is not None and not self._task.done():
+            self._rerun = True
+            return
+        # Fresh context: a copy of the triggering request's would keep charging its
+        # db time and Server-Timing (and keep them alive) after the response is sent
+        self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            self._rerun = False
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Related posts job failed: {str(e)}")
+            if not self._rerun:
+                return
+
+    async def run_once(self) -> int:
+        """Recompute and store related slugs. Returns how many posts changed."""
+        posts = await self.collection.find({"published": True}, RELATED_PROJECTION).to_list(None)
+        # CPU-bound; keep it off the event loop
+        related = await asyncio.to_thread(compute_related, posts, self.k)
+        ops = [
+            UpdateOne({"id": post["id"]}, {"$set": {"related": related[post["id"]]}})
+            for post in posts
+            if post.get("related", []) != related[post["id"]]
+        ]
+        if ops:
+            await self.collection.bulk_write(ops, ordered=False)
+        # Unpublished posts are neither recommended nor shown, so drop whatever they had
+        cleared = await self.collection.update_many(
+            {"published": False, "related.0": {"$exists": True}}, {"$set": {"related": []}}
+        )
+        changed = len(ops) + cleared.modified_count
+        self.runs += 1
+        self.last_updated = changed
+        if changed and self.on_updated:
+            self.on_updated()
+        return changed
@@ -0,0 +1,185 @@
+"""
+In-process full-text search over published blog posts.
+
+An inverted index over title, excerpt, HTML-stripped content and category,
+ranked with BM25 (field-weighted term frequencies). Text is folded to ASCII
+lowercase, so "ședință", "şedinţă" (cedilla variants) and "sedinta" all match.
+
+Each worker holds its own index: the admin blog routes update it incrementally
+on the worker that handled the change, and a periodic rebuild brings the other
+workers up to date.
+"""
+
+import bisect
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from html.parser import HTMLParser
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+FIELD_WEIGHTS = {"title": 3.0, "category": 2.0, "excerpt": 1.5, "content": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MIN_PREFIX_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics (ă â î ș ş ț ţ -> a a i s s t t)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def strip_html(html: str) -> str:
+    extractor = _TextExtractor()
+    extractor.feed(html or "")
+    extractor.close()
+    return " ".join(" ".join(extractor.parts).split())
+
+
+class SearchIndex:
+    def __init__(self, summary_fields: Iterable[str]):
+        self.summary_fields = list(summary_fields)
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._summaries: Dict[str, dict] = {}
+        self._total_len = 0.0
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        # add/remove calls made while `reload` awaits its query, replayed on the new index
+        self._journal: Optional[List[Tuple[str, object]]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def _field_text(self, post: dict, field: str) -> str:
+        if field == "content":
+            # Preprocessed plain text when the post has it, otherwise strip the HTML here
+            return post.get("content_text") or strip_html(post.get("content", ""))
+        return post.get(field) or ""
+
+    def add(self, post: dict) -> None:
+        """Index (or re-index) a post. `post` must contain `id` and the searchable fields."""
+        doc_id = post["id"]
+        if self._journal is not None:
+            self._journal.append(("add", post))
+        self._unindex(doc_id)
+        frequencies: Dict[str, float] = defaultdict(float)
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(self._field_text(post, field)):
+                frequencies[token] += weight
+                length += weight
+        for term, tf in frequencies.items():
+            if term not in self._postings:
+                self._vocabulary_dirty = True
+            self._postings[term][doc_id] = tf
+        self._doc_terms[doc_id] = list(frequencies)
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        self._summaries[doc_id] = {k: post[k] for k in self.summary_fields if k in post}
+
+    def remove(self, doc_id: str) -> None:
+        if self._journal is not None:
+            self._journal.append(("remove", doc_id))
+        self._unindex(doc_id)
+
+    def _unindex(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+        self._total_len -= self._doc_len.pop(doc_id)
+        self._summaries.pop(doc_id, None)
+
+    def rebuild(self, posts: Iterable[dict]) -> None:
+        fresh = SearchIndex(self.summary_fields)
+        for post in posts:
+            fresh.add(post)
+        self.__dict__.update(fresh.__dict__)
+
+    async def reload(self, load: Callable[[], Awaitable[List[dict]]]) -> int:
+        """Rebuild from `load()` (a database query). Edits made while it runs are applied on
+        top of the result, since the query may have read the data before them."""
+        journal = self._journal = []
+        try:
+            posts = await load()
+        finally:
+            self._journal = None
+        self.rebuild(posts)
+        for op, arg in journal:
+            if op == "add":
+                self.add(arg)
+            else:
+                self.remove(arg)
+        return len(posts)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[dict, float]]:
+        """Best matches as (summary, score), highest score first."""
+        tokens = tokenize(query)
+        if not tokens or not self._doc_len:
+            return []
+        # The last word may still be being typed: also match terms that start with it
+        terms = {t: 1.0 for t in tokens}
+        last = tokens[-1]
+        if len(last) >= MIN_PREFIX_LENGTH:
+            for term in self._expand_prefix(last):
+                terms.setdefault(term, 0.5)
+
+        n_docs = len(self._doc_len)
+        avg_len = self._total_len / n_docs
+        scores: Dict[str, float] = defaultdict(float)
+        for term, boost in terms.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] += boost * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self._summaries[doc_id], score) for doc_id, score in best]
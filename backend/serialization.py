@@ -0,0 +1,40 @@
+"""
+Fast-path JSON responses for trusted database reads.
+
+Routes still declare `response_model` (so the OpenAPI schema is unchanged), but
+instead of returning raw dicts -- which FastAPI re-validates through Pydantic and
+re-encodes with the stdlib `json` -- they return a `FastJSONResponse` built from
+the Mongo documents directly. FastAPI passes Response objects through untouched.
+
+Only use this for documents written through the API models: the payload is not
+validated, so the query projection (see `model_projection`) is what keeps the
+output in the shape the schema promises.
+"""
+
+from typing import Any, Iterable, Type
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.responses import Response
+
+from timing import timed
+
+
+class FastJSONResponse(Response):
+    """JSON response serialized by pydantic-core (datetimes as ISO 8601, same as response_model)."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        with timed("serialize"):
+            return to_json(content)
+
+
+def model_projection(model: Type[BaseModel], exclude: Iterable[str] = ()) -> dict:
+    """Mongo projection returning exactly the fields declared on `model`."""
+    projection = {"_id": 0}
+    for name in model.model_fields:
+        if name not in exclude:
+            projection[name] = 1
+    return projection
@@ -1,37 +1,161 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from bson.codec_options import CodecOptions
 import os
 import logging
 import asyncio
+import contextvars
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_validator
+from typing import List, Literal, Optional
 import uuid
+import secrets
 from datetime import datetime, timezone
-import jwt
-import bcrypt
 import resend
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from bulk import BulkFilter, BulkRequest, BulkResult, run_bulk
+from auth import EpochCache, TokenRejected, TokenVerifier
+from cache import TTLCache
+from content import preprocess_content
+from export import iter_csv, iter_ndjson
+from metrics import MetricsMiddleware, RequestMetrics, render_gauge
+from mongo_monitoring import CommandMonitor, PoolMonitor, RequestDbTimeMiddleware
+from dashboard import DashboardCounts, dashboard_counts
+from dedup import Deduplicator, IdempotencyKeyReused, content_fingerprint
+from http_cache import cache_control_for, conditional_response, render_json
+from migrations import run_migrations
+from outbox import PENDING, EmailOutbox, FakeTransport, ResendTransport
+from passwords import PasswordHasher, PasswordPoolBusy
+from ratelimit import MemoryBackend, MongoBackend, RateLimitMiddleware, RateLimitRule
+from related import RelatedPostsJob
+from search import SearchIndex
+from pagination import Page, page_cursor, paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT as PAGE_SORT
+from serialization import FastJSONResponse, model_projection
+from streaming import stream_page
+from timing import ServerTimingMiddleware, timed
+from views import ViewCounter
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Connection pool and command events feed /api/metrics; commands slower than
+# MONGO_SLOW_QUERY_MS are logged with their filter shape
+pool_monitor = PoolMonitor()
+command_monitor = CommandMonitor(slow_threshold_ms=float(os.environ.get('MONGO_SLOW_QUERY_MS', '100')))
+client = AsyncIOMotorClient(mongo_url, event_listeners=[pool_monitor, command_monitor])
+# Timestamps are stored as native BSON dates and decoded as timezone-aware UTC datetimes
+db = client.get_database(
+    os.environ['DB_NAME'],
+    codec_options=CodecOptions(tz_aware=True, tzinfo=timezone.utc),
+)
 
 # Resend setup
 resend.api_key = os.environ.get('RESEND_API_KEY', '')
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'onboarding@resend.dev')
 RECIPIENT_EMAIL = os.environ.get('RECIPIENT_EMAIL', 'contact@bcon.ro')
 
+# Email outbox: contact notifications are queued and delivered by a background worker.
+# EMAIL_TRANSPORT=fake records messages in memory instead of calling Resend (local dev / tests).
+EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'resend')
+if EMAIL_TRANSPORT == 'fake':
+    email_transport = FakeTransport()
+elif resend.api_key:
+    email_transport = ResendTransport(resend)
+else:
+    email_transport = None
+email_outbox = EmailOutbox(
+    db.email_outbox,
+    email_transport,
+    concurrency=int(os.environ.get('EMAIL_OUTBOX_CONCURRENCY', '4')),
+    max_attempts=int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '8')),
+) if email_transport else None
+
+# Repeated contact submissions (same email + message within the window, or a reused
+# Idempotency-Key) return the original message instead of storing and emailing it again
+contact_dedup = Deduplicator(
+    db.submission_dedup,
+    scope="contact",
+    window=float(os.environ.get('CONTACT_DEDUP_WINDOW_SECONDS', '600')),
+    idempotency_ttl=float(os.environ.get('IDEMPOTENCY_KEY_TTL_SECONDS', '86400')),
+)
+
+# Apply pending index migrations when the app boots (disable to run them from the CLI only)
+RUN_MIGRATIONS_ON_STARTUP = os.environ.get('RUN_MIGRATIONS_ON_STARTUP', 'true').lower() == 'true'
+
+# Public read cache, invalidated by the admin mutation routes
+read_cache = TTLCache(
+    maxsize=int(os.environ.get('CACHE_MAX_ENTRIES', '512')),
+    ttl=float(os.environ.get('CACHE_TTL_SECONDS', '60')),
+)
+
+def invalidate_public(namespace: str):
+    read_cache.invalidate(namespace)
+    # The homepage payload embeds blog, project and testimonial data
+    read_cache.invalidate("home")
+
+# Blog search index, rebuilt from Mongo at startup and every SEARCH_REFRESH_SECONDS
+# (picks up changes made through other workers); local admin edits apply immediately
+SEARCH_REFRESH_SECONDS = float(os.environ.get('SEARCH_REFRESH_SECONDS', '300'))
+search_refresh_task: Optional[asyncio.Task] = None
+
+# Blog post views are counted in memory and flushed as one bulk $inc every few seconds
+view_counter = ViewCounter(
+    db.blog_posts,
+    flush_interval=float(os.environ.get('VIEW_FLUSH_SECONDS', '5')),
+)
+
+# Related posts are recomputed in the background after each admin blog change
+related_job = RelatedPostsJob(
+    db.blog_posts,
+    k=int(os.environ.get('RELATED_POSTS_COUNT', '3')),
+    on_updated=lambda: read_cache.invalidate("blog"),
+)
+
+# Token-bucket limits on abuse-prone routes, as "<burst>/<seconds to refill>".
+# RATE_LIMIT_BACKEND=mongo shares the buckets between workers.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_RULES = {
+    ("POST", "/api/contact"): RateLimitRule.parse(os.environ.get('RATE_LIMIT_CONTACT', '5/600')),
+    ("POST", "/api/admin/login"): RateLimitRule.parse(os.environ.get('RATE_LIMIT_LOGIN', '10/300')),
+}
+# Behind a reverse proxy the socket peer is the proxy; take the client IP from X-Forwarded-For instead
+RATE_LIMIT_TRUST_FORWARDED_FOR = os.environ.get('RATE_LIMIT_TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+
+# Per-route request metrics, served in Prometheus text format at /api/metrics.
+# Scrapers must send METRICS_TOKEN as a bearer token; with no token configured the endpoint is off.
+request_metrics = RequestMetrics()
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Server-Timing header on every response, or only for admins sending X-Server-Timing: 1
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
 # JWT Config
 JWT_SECRET = os.environ.get('JWT_SECRET', 'bcon-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 
+# Admin tokens are verified without a DB read; revocation goes through per-user token epochs
+token_verifier = TokenVerifier(
+    JWT_SECRET,
+    JWT_ALGORITHM,
+    EpochCache(db.admin_users, refresh_interval=float(os.environ.get('TOKEN_EPOCH_REFRESH_SECONDS', '30'))),
+)
+
+# Password hashing runs in a bounded thread pool; changing BCRYPT_ROUNDS rehashes on next login
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+    max_concurrency=int(os.environ.get('BCRYPT_MAX_CONCURRENCY', '2')),
+    max_queue=int(os.environ.get('BCRYPT_MAX_QUEUE', '32')),
+)
+
 # Security
 security = HTTPBearer()
 
@@ -68,6 +192,11 @@ class ContactMessageCreate(BaseModel):
     company: str = ""
     message: str = Field(..., min_length=10)
 
+class HeadingOutline(BaseModel):
+    level: int
+    text: str
+    anchor: str
+
 class BlogPost(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -81,6 +210,70 @@ class BlogPost(BaseModel):
     published: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Derived from `content` on write (see content.py); `content_text` is stored but not returned
+    content_html: str = ""
+    word_count: int = 0
+    reading_time: int = 0
+    outline: List[HeadingOutline] = []
+    related: List[str] = []  # slugs, maintained by the related posts job
+
+class BlogPostSummary(BaseModel):
+    """Blog index entry: everything except the full HTML `content`, unless requested via ?fields="""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: str
+    slug: str
+    excerpt: str
+    image_url: str = ""
+    category: str = ""
+    author: str = "B-CON Consulting"
+    published: bool = False
+    created_at: datetime
+    updated_at: datetime
+    reading_time: int = 0
+    content: Optional[str] = None
+
+# Declared on BlogPostSummary but only returned when listed in ?fields=
+BLOG_SUMMARY_OPTIONAL_FIELDS = ("content",)
+
+def blog_summary_projection(fields: Optional[str]) -> dict:
+    """Mongo projection for the blog index, plus the optional summary fields listed in `fields`."""
+    projection = model_projection(BlogPostSummary, exclude=BLOG_SUMMARY_OPTIONAL_FIELDS)
+    if fields:
+        extra = sorted({f.strip() for f in fields.split(",") if f.strip()})
+        # The route skips response validation, so anything not declared on the model must be refused here
+        unknown = [f for f in extra if f not in BLOG_SUMMARY_OPTIONAL_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        for name in extra:
+            projection[name] = 1
+    return projection
+
+class BlogPostDetail(BlogPost):
+    related_posts: List[BlogPostSummary] = []
+
+# view_count changes with every flush, so it is left out of the cached, ETagged post and index
+# payloads (it would change their validators on every read) and only served where it is the point
+class PopularBlogPost(BlogPostSummary):
+    view_count: int = 0
+
+class AdminBlogPost(BlogPost):
+    view_count: int = 0
+
+class BlogSearchHit(BlogPostSummary):
+    score: float
+
+class BlogSearchResults(BaseModel):
+    query: str
+    items: List[BlogSearchHit]
+
+# Paths under /api/blog/ that are routes of their own; a post with one of these slugs could never be shown
+RESERVED_BLOG_SLUGS = frozenset({"search", "popular"})
+
+def check_blog_slug(slug: Optional[str]) -> Optional[str]:
+    if slug is not None and slug.lower() in RESERVED_BLOG_SLUGS:
+        raise ValueError(f"Slug '{slug}' is reserved")
+    return slug
 
 class BlogPostCreate(BaseModel):
     title: str = Field(..., min_length=5)
@@ -91,6 +284,8 @@ class BlogPostCreate(BaseModel):
     category: str = ""
     published: bool = False
 
+    _check_slug = field_validator("slug")(check_blog_slug)
+
 class BlogPostUpdate(BaseModel):
     title: Optional[str] = None
     slug: Optional[str] = None
@@ -100,12 +295,15 @@ class BlogPostUpdate(BaseModel):
     category: Optional[str] = None
     published: Optional[bool] = None
 
+    _check_slug = field_validator("slug")(check_blog_slug)
+
 class AdminUser(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     email: EmailStr
     password_hash: str
     name: str
+    token_epoch: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class AdminLogin(BaseModel):
@@ -167,36 +365,96 @@ class ProjectCreate(BaseModel):
     year: str = ""
     is_featured: bool = False
 
+# Admin list routes stream their pages, so they can afford much larger ones than the public routes
+ADMIN_MAX_PAGE_SIZE = 1000
+
+# Projections for the fast-path list routes: exactly the fields each response model declares
+CONTACT_PROJECTION = model_projection(ContactMessage)
+BLOG_POST_PROJECTION = model_projection(BlogPost)
+ADMIN_BLOG_POST_PROJECTION = model_projection(AdminBlogPost)
+POPULAR_POST_PROJECTION = model_projection(PopularBlogPost, exclude=BLOG_SUMMARY_OPTIONAL_FIELDS)
+TESTIMONIAL_PROJECTION = model_projection(Testimonial)
+PROJECT_PROJECTION = model_projection(Project)
+
+SEARCH_SUMMARY_FIELDS = [f for f in BlogPostSummary.model_fields if f not in BLOG_SUMMARY_OPTIONAL_FIELDS]
+SEARCH_PROJECTION = {**model_projection(BlogPostSummary, exclude=BLOG_SUMMARY_OPTIONAL_FIELDS), "content_text": 1}
+search_index = SearchIndex(SEARCH_SUMMARY_FIELDS)
+
+class ContactBulkFilter(BulkFilter):
+    is_read: Optional[bool] = None
+
+class ContactBulkRequest(BulkRequest):
+    action: Literal["mark_read", "mark_unread", "delete"]
+    filter: Optional[ContactBulkFilter] = None
+
+class BlogBulkFilter(BulkFilter):
+    published: Optional[bool] = None
+
+class BlogBulkRequest(BulkRequest):
+    action: Literal["publish", "unpublish", "delete"]
+    filter: Optional[BlogBulkFilter] = None
+
+class TestimonialBulkFilter(BulkFilter):
+    is_active: Optional[bool] = None
+
+class TestimonialBulkRequest(BulkRequest):
+    action: Literal["activate", "deactivate", "delete"]
+    filter: Optional[TestimonialBulkFilter] = None
+
+class ProjectBulkFilter(BulkFilter):
+    is_featured: Optional[bool] = None
+
+class ProjectBulkRequest(BulkRequest):
+    action: Literal["feature", "unfeature", "delete"]
+    filter: Optional[ProjectBulkFilter] = None
+
+class HomePayload(BaseModel):
+    featured_projects: List[Project]
+    testimonials: List[Testimonial]
+    latest_posts: List[BlogPostSummary]
+
+class AdminDashboard(BaseModel):
+    posts: Page[BlogPostSummary]
+    contacts: Page[ContactMessage]
+    projects: Page[Project]
+    testimonials: Page[Testimonial]
+    counts: DashboardCounts
+
 # ==================== AUTH HELPERS ====================
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+async def hash_password(password: str) -> str:
+    try:
+        with timed("bcrypt"):
+            return await password_hasher.hash(password)
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
 
-def verify_password(password: str, password_hash: str) -> bool:
-    return bcrypt.checkpw(password.encode(), password_hash.encode())
+async def verify_password(password: str, password_hash: str) -> bool:
+    try:
+        with timed("bcrypt"):
+            return await password_hasher.verify(password, password_hash)
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
 
-def create_token(user_id: str, email: str) -> str:
-    payload = {
-        "sub": user_id,
-        "email": email,
-        "exp": datetime.now(timezone.utc).timestamp() + 86400  # 24 hours
-    }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+def create_token(user: dict) -> str:
+    return token_verifier.encode(
+        user['id'], user['email'], user['name'], user.get('token_epoch', 0),
+        ttl_seconds=86400  # 24 hours
+    )
 
 async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.admin_users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        with timed("auth"):
+            return await token_verifier.verify(credentials.credentials)
+    except TokenRejected as e:
+        raise HTTPException(status_code=401, detail=e.detail)
+
+async def is_admin_token(token: str) -> bool:
+    try:
+        await token_verifier.verify(token)
+        return True
+    except TokenRejected:
+        return False
 
 # ==================== PUBLIC ROUTES ====================
 
@@ -208,89 +466,200 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    # Route inventory, latencies and queue depths are not for the public: fail closed
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    lines = request_metrics.render() + pool_monitor.render() + command_monitor.render()
+    if email_outbox:
+        lines += render_gauge("email_outbox_depth", "Emails waiting to be delivered", await email_outbox.depth())
+    lines += render_gauge("blog_views_pending", "Blog views not yet flushed to MongoDB", view_counter.pending())
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Contact Form
+def build_contact_email(contact_obj: ContactMessage) -> dict:
+    html_content = f"""
+    <h2>Mesaj nou de pe website B-CON Consulting</h2>
+    <p><strong>Nume:</strong> {contact_obj.name}</p>
+    <p><strong>Email:</strong> {contact_obj.email}</p>
+    <p><strong>Telefon:</strong> {contact_obj.phone or 'Nespecificat'}</p>
+    <p><strong>Companie:</strong> {contact_obj.company or 'Nespecificat'}</p>
+    <p><strong>Mesaj:</strong></p>
+    <p>{contact_obj.message}</p>
+    <hr>
+    <p><small>Trimis la: {contact_obj.created_at.strftime('%d.%m.%Y %H:%M')}</small></p>
+    """
+    return {
+        "from": SENDER_EMAIL,
+        "to": [RECIPIENT_EMAIL],
+        "subject": f"Mesaj nou de la {contact_obj.name} - B-CON Website",
+        "html": html_content
+    }
+
+def contact_notification(doc: dict) -> dict:
+    """Outbox message for a stored contact document with a pending notification."""
+    return build_contact_email(ContactMessage(**doc))
+
 @api_router.post("/contact", response_model=ContactMessage)
-async def submit_contact(input: ContactMessageCreate):
+async def submit_contact(
+    input: ContactMessageCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
     contact_obj = ContactMessage(**input.model_dump())
     doc = contact_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    
-    await db.contact_messages.insert_one(doc)
+    fingerprint = content_fingerprint(input.email.lower(), input.message)
+    try:
+        original = await contact_dedup.claim(fingerprint, doc, idempotency_key)
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different message")
+    except Exception as e:
+        # Fail open, like the rate limiter: a dedup outage should not take the contact form down with it
+        logger.error(f"Contact deduplication unavailable, accepting submission: {str(e)}")
+        original = None
+    if original:
+        return original
     
-    # Send email notification (async, non-blocking)
-    if resend.api_key:
+    try:
+        # The notification request is stored in the same write as the message, so it can't be
+        # lost between two writes; the outbox worker queues and sends it
+        await db.contact_messages.insert_one(
+            {**doc, "notification": {"status": PENDING}} if email_outbox else doc
+        )
+    except Exception:
+        # Let the client's retry go through instead of being answered with a message that was never stored
         try:
-            html_content = f"""
-            <h2>Mesaj nou de pe website B-CON Consulting</h2>
-            <p><strong>Nume:</strong> {contact_obj.name}</p>
-            <p><strong>Email:</strong> {contact_obj.email}</p>
-            <p><strong>Telefon:</strong> {contact_obj.phone or 'Nespecificat'}</p>
-            <p><strong>Companie:</strong> {contact_obj.company or 'Nespecificat'}</p>
-            <p><strong>Mesaj:</strong></p>
-            <p>{contact_obj.message}</p>
-            <hr>
-            <p><small>Trimis la: {contact_obj.created_at.strftime('%d.%m.%Y %H:%M')}</small></p>
-            """
-            params = {
-                "from": SENDER_EMAIL,
-                "to": [RECIPIENT_EMAIL],
-                "subject": f"Mesaj nou de la {contact_obj.name} - B-CON Website",
-                "html": html_content
-            }
-            await asyncio.to_thread(resend.Emails.send, params)
-            logger.info(f"Email notification sent for contact from {contact_obj.email}")
+            await contact_dedup.release(fingerprint, doc, idempotency_key)
         except Exception as e:
-            logger.error(f"Failed to send email notification: {str(e)}")
-    
+            logger.error(f"Failed to release contact dedup claim: {str(e)}")
+        raise
+
+    if email_outbox:
+        email_outbox.wake()
+
     return contact_obj
 
 # Blog Posts (Public)
-@api_router.get("/blog", response_model=List[BlogPost])
-async def get_published_posts():
-    posts = await db.blog_posts.find({"published": True}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for post in posts:
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    return posts
-
-@api_router.get("/blog/{slug}", response_model=BlogPost)
-async def get_post_by_slug(slug: str):
-    post = await db.blog_posts.find_one({"slug": slug, "published": True}, {"_id": 0})
-    if not post:
+@api_router.get("/blog", response_model=Page[BlogPostSummary], response_model_exclude_none=True)
+async def get_published_posts(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=f"Comma-separated extra fields to include: {', '.join(BLOG_SUMMARY_OPTIONAL_FIELDS)}"),
+):
+    projection = blog_summary_projection(fields)
+    async def load():
+        return render_json(await paginate(db.blog_posts, {"published": True}, limit, cursor, projection))
+    rendered = await read_cache.get_or_load(("blog", "published", limit, cursor, tuple(projection)), load)
+    return conditional_response(request, rendered, cache_control_for("blog_list"))
+
+# Declared before /blog/{slug} so "search" is not taken for a slug
+@api_router.get("/blog/search", response_model=BlogSearchResults, response_model_exclude_none=True)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+):
+    # Served from the in-process index, no database round trip
+    hits = [{**summary, "score": round(score, 4)} for summary, score in search_index.search(q, limit)]
+    return FastJSONResponse({"query": q, "items": hits})
+
+POPULAR_SORT = [("view_count", -1), ("id", -1)]
+
+@api_router.get("/blog/popular", response_model=List[PopularBlogPost], response_model_exclude_none=True)
+async def get_popular_posts(request: Request, limit: int = Query(5, ge=1, le=20)):
+    async def load():
+        posts = await db.blog_posts.find(
+            {"published": True}, POPULAR_POST_PROJECTION
+        ).sort(POPULAR_SORT).to_list(limit)
+        return render_json(posts)
+    # Counts reach Mongo every VIEW_FLUSH_SECONDS anyway; the cache TTL bounds how stale the ranking gets
+    rendered = await read_cache.get_or_load(("blog", "popular", limit), load)
+    return conditional_response(request, rendered, cache_control_for("blog_popular"))
+
+async def query_related_posts(slugs: List[str]) -> list:
+    if not slugs:
+        return []
+    posts = await db.blog_posts.find(
+        {"slug": {"$in": slugs}, "published": True}, blog_summary_projection(None)
+    ).to_list(len(slugs))
+    by_slug = {post["slug"]: post for post in posts}
+    return [by_slug[s] for s in slugs if s in by_slug]
+
+@api_router.get("/blog/{slug}", response_model=BlogPostDetail, response_model_exclude_none=True)
+async def get_post_by_slug(slug: str, request: Request):
+    async def load():
+        post = await db.blog_posts.find_one({"slug": slug, "published": True}, BLOG_POST_PROJECTION)
+        if not post:
+            return None
+        post["related_posts"] = await query_related_posts(post.get("related", []))
+        # ETag only: the body also depends on the related job and on other posts, which updated_at doesn't cover
+        return render_json(post)
+    # Misses are cached too, so unknown slugs don't hit Mongo on every request
+    rendered = await read_cache.get_or_load(("blog", "slug", slug), load)
+    if not rendered:
         raise HTTPException(status_code=404, detail="Post not found")
-    if isinstance(post.get('created_at'), str):
-        post['created_at'] = datetime.fromisoformat(post['created_at'])
-    if isinstance(post.get('updated_at'), str):
-        post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    return post
+    view_counter.record(slug)
+    return conditional_response(request, rendered, cache_control_for("blog_post"))
 
 # Testimonials (Public)
+async def query_active_testimonials() -> list:
+    return await db.testimonials.find({"is_active": True}, TESTIMONIAL_PROJECTION).to_list(50)
+
 @api_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials():
-    testimonials = await db.testimonials.find({"is_active": True}, {"_id": 0}).to_list(50)
-    for t in testimonials:
-        if isinstance(t.get('created_at'), str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
-    return testimonials
+async def get_testimonials(request: Request):
+    async def load():
+        return render_json(await query_active_testimonials())
+    rendered = await read_cache.get_or_load(("testimonials", "active"), load)
+    return conditional_response(request, rendered, cache_control_for("testimonials"))
 
 # Projects (Public)
-@api_router.get("/projects", response_model=List[Project])
-async def get_projects():
-    projects = await db.projects.find({}, {"_id": 0}).sort("created_at", -1).to_list(50)
-    for p in projects:
-        if isinstance(p.get('created_at'), str):
-            p['created_at'] = datetime.fromisoformat(p['created_at'])
-    return projects
+@api_router.get("/projects", response_model=Page[Project])
+async def get_projects(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    async def load():
+        return render_json(await paginate(db.projects, {}, limit, cursor, PROJECT_PROJECTION))
+    rendered = await read_cache.get_or_load(("projects", "all", limit, cursor), load)
+    return conditional_response(request, rendered, cache_control_for("projects"))
+
+async def query_featured_projects() -> list:
+    return await db.projects.find({"is_featured": True}, PROJECT_PROJECTION).to_list(10)
 
 @api_router.get("/projects/featured", response_model=List[Project])
-async def get_featured_projects():
-    projects = await db.projects.find({"is_featured": True}, {"_id": 0}).to_list(10)
-    for p in projects:
-        if isinstance(p.get('created_at'), str):
-            p['created_at'] = datetime.fromisoformat(p['created_at'])
-    return projects
+async def get_featured_projects(request: Request):
+    async def load():
+        return render_json(await query_featured_projects())
+    rendered = await read_cache.get_or_load(("projects", "featured"), load)
+    return conditional_response(request, rendered, cache_control_for("projects_featured"))
+
+# Homepage (Public)
+HOME_LATEST_POSTS = int(os.environ.get('HOME_LATEST_POSTS', '3'))
+
+async def query_latest_posts(limit: int) -> list:
+    return await db.blog_posts.find(
+        {"published": True}, blog_summary_projection(None)
+    ).sort(PAGE_SORT).to_list(limit)
+
+@api_router.get("/home", response_model=HomePayload)
+async def get_home(request: Request):
+    # Rendered once per change to blog posts, projects or testimonials (see invalidate_public)
+    async def load():
+        featured_projects, testimonials, latest_posts = await asyncio.gather(
+            query_featured_projects(),
+            query_active_testimonials(),
+            query_latest_posts(HOME_LATEST_POSTS),
+        )
+        return render_json({
+            "featured_projects": featured_projects,
+            "testimonials": testimonials,
+            "latest_posts": latest_posts,
+        })
+    rendered = await read_cache.get_or_load(("home",), load)
+    return conditional_response(request, rendered, cache_control_for("home"))
 
 # ==================== ADMIN AUTH ====================
 
@@ -302,25 +671,61 @@ async def admin_register(input: AdminRegister):
     
     admin = AdminUser(
         email=input.email,
-        password_hash=hash_password(input.password),
+        password_hash=await hash_password(input.password),
         name=input.name
     )
     doc = admin.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.admin_users.insert_one(doc)
+    try:
+        await db.admin_users.insert_one(doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration of the same email
+        raise HTTPException(status_code=400, detail="Email already registered")
+    token_verifier.epochs.set(admin.id, admin.token_epoch)
     
-    token = create_token(admin.id, admin.email)
+    token = create_token(doc)
     return TokenResponse(access_token=token)
 
+async def rehash_password(user: dict, password: str):
+    """Upgrade the stored hash to the configured cost while we have the plaintext.
+
+    Best effort: the login already succeeded, so a busy bcrypt pool or a failed write
+    only postpones the upgrade to the next login.
+    """
+    try:
+        with timed("bcrypt"):
+            new_hash = await password_hasher.hash(password)
+        await db.admin_users.update_one(
+            {"id": user['id'], "password_hash": user['password_hash']},
+            {"$set": {"password_hash": new_hash}}
+        )
+    except Exception as e:
+        logger.warning(f"Skipped password rehash for admin {user['id']}: {e.__class__.__name__}: {str(e)}")
+
 @api_router.post("/admin/login", response_model=TokenResponse)
 async def admin_login(input: AdminLogin):
     user = await db.admin_users.find_one({"email": input.email}, {"_id": 0})
-    if not user or not verify_password(input.password, user['password_hash']):
+    if not user or not await verify_password(input.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_token(user['id'], user['email'])
+    if password_hasher.needs_rehash(user['password_hash']):
+        await rehash_password(user, input.password)
+
+    token = create_token(user)
     return TokenResponse(access_token=token)
 
+@api_router.post("/admin/logout")
+async def admin_logout(current_user: dict = Depends(get_current_admin)):
+    # Bumping the epoch revokes every token issued to this admin so far
+    user = await db.admin_users.find_one_and_update(
+        {"id": current_user['id']},
+        {"$inc": {"token_epoch": 1}},
+        projection={"token_epoch": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if user:
+        token_verifier.epochs.set(current_user['id'], user['token_epoch'])
+    return {"message": "Logged out"}
+
 @api_router.get("/admin/me")
 async def get_admin_profile(current_user: dict = Depends(get_current_admin)):
     return {
@@ -329,48 +734,111 @@ async def get_admin_profile(current_user: dict = Depends(get_current_admin)):
         "name": current_user['name']
     }
 
+@api_router.get("/admin/cache/stats")
+async def admin_cache_stats(current_user: dict = Depends(get_current_admin)):
+    return read_cache.stats()
+
+@api_router.get("/admin/auth/stats")
+async def admin_auth_stats(current_user: dict = Depends(get_current_admin)):
+    return token_verifier.stats()
+
+@api_router.get("/admin/password-pool/stats")
+async def admin_password_pool_stats(current_user: dict = Depends(get_current_admin)):
+    return password_hasher.stats()
+
+@api_router.get("/admin/views/stats")
+async def admin_view_counter_stats(current_user: dict = Depends(get_current_admin)):
+    return view_counter.stats()
+
+@api_router.get("/admin/outbox/stats")
+async def admin_outbox_stats(current_user: dict = Depends(get_current_admin)):
+    if not email_outbox:
+        return {"enabled": False}
+    return {"enabled": True, **(await email_outbox.stats())}
+
+# ==================== ADMIN DASHBOARD ====================
+
+@api_router.get("/admin/dashboard", response_model=AdminDashboard, response_model_exclude_none=True)
+async def admin_get_dashboard(
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_admin),
+):
+    # First page of every list plus the counters, fetched concurrently behind one auth check.
+    # Further pages come from the individual list routes using each next_cursor.
+    posts, contacts, projects, testimonials, counts = await asyncio.gather(
+        paginate(db.blog_posts, {}, limit, None, blog_summary_projection(None)),
+        paginate(db.contact_messages, {}, limit, None, CONTACT_PROJECTION),
+        paginate(db.projects, {}, limit, None, PROJECT_PROJECTION),
+        paginate(db.testimonials, {}, limit, None, TESTIMONIAL_PROJECTION),
+        dashboard_counts(db),
+    )
+    return FastJSONResponse({
+        "posts": posts,
+        "contacts": contacts,
+        "projects": projects,
+        "testimonials": testimonials,
+        "counts": counts,
+    })
+
+@api_router.get("/admin/dashboard/counts", response_model=DashboardCounts)
+async def admin_get_dashboard_counts(current_user: dict = Depends(get_current_admin)):
+    # Lets the dashboard refresh its counters after a change without reloading (and truncating) its lists
+    return await dashboard_counts(db)
+
 # ==================== ADMIN BLOG MANAGEMENT ====================
 
-@api_router.get("/admin/blog", response_model=List[BlogPost])
-async def admin_get_all_posts(current_user: dict = Depends(get_current_admin)):
-    posts = await db.blog_posts.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    for post in posts:
-        if isinstance(post.get('created_at'), str):
-            post['created_at'] = datetime.fromisoformat(post['created_at'])
-        if isinstance(post.get('updated_at'), str):
-            post['updated_at'] = datetime.fromisoformat(post['updated_at'])
-    return posts
+def index_post(post: dict):
+    """Keep the search index in step with a created/updated post (only published posts are searchable)."""
+    if post.get("published"):
+        search_index.add(post)
+    else:
+        search_index.remove(post["id"])
+
+@api_router.get("/admin/blog", response_model=Page[AdminBlogPost])
+async def admin_get_all_posts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin),
+):
+    return await stream_page(page_cursor(db.blog_posts, {}, limit, cursor, ADMIN_BLOG_POST_PROJECTION), limit)
 
 @api_router.post("/admin/blog", response_model=BlogPost)
 async def admin_create_post(input: BlogPostCreate, current_user: dict = Depends(get_current_admin)):
-    existing = await db.blog_posts.find_one({"slug": input.slug}, {"_id": 0})
-    if existing:
+    derived = preprocess_content(input.content)
+    post = BlogPost(**input.model_dump(), **derived, author=current_user['name'])
+    doc = {**post.model_dump(), "content_text": derived["content_text"], "view_count": 0}
+    try:
+        # The unique slug index rejects duplicates atomically, no pre-check round trip needed
+        await db.blog_posts.insert_one(doc)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Slug already exists")
-    
-    post = BlogPost(**input.model_dump(), author=current_user['name'])
-    doc = post.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    await db.blog_posts.insert_one(doc)
+    invalidate_public("blog")
+    index_post(doc)
+    related_job.trigger()
     return post
 
 @api_router.put("/admin/blog/{post_id}", response_model=BlogPost)
 async def admin_update_post(post_id: str, input: BlogPostUpdate, current_user: dict = Depends(get_current_admin)):
-    existing = await db.blog_posts.find_one({"id": post_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
     update_data = {k: v for k, v in input.model_dump().items() if v is not None}
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-    
-    await db.blog_posts.update_one({"id": post_id}, {"$set": update_data})
-    updated = await db.blog_posts.find_one({"id": post_id}, {"_id": 0})
-    
-    if isinstance(updated.get('created_at'), str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
-    if isinstance(updated.get('updated_at'), str):
-        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
+    update_data['updated_at'] = datetime.now(timezone.utc)
+    if 'content' in update_data:
+        update_data.update(preprocess_content(update_data['content']))
     
+    try:
+        updated = await db.blog_posts.find_one_and_update(
+            {"id": post_id},
+            {"$set": update_data},
+            # content_text feeds the search index; response_model drops it from the response
+            projection={**BLOG_POST_PROJECTION, "content_text": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Slug already exists")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Post not found")
+    invalidate_public("blog")
+    index_post(updated)
+    related_job.trigger()
     return updated
 
 @api_router.delete("/admin/blog/{post_id}")
@@ -378,17 +846,70 @@ async def admin_delete_post(post_id: str, current_user: dict = Depends(get_curre
     result = await db.blog_posts.delete_one({"id": post_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Post not found")
+    invalidate_public("blog")
+    search_index.remove(post_id)
+    related_job.trigger()
     return {"message": "Post deleted"}
 
+@api_router.post("/admin/blog/bulk", response_model=BulkResult)
+async def admin_bulk_posts(input: BlogBulkRequest, current_user: dict = Depends(get_current_admin)):
+    now = datetime.now(timezone.utc)
+    update = {
+        "publish": {"$set": {"published": True, "updated_at": now}},
+        "unpublish": {"$set": {"published": False, "updated_at": now}},
+        "delete": None,
+    }[input.action]
+    result = await run_bulk(db.blog_posts, input, update)
+    if result["matched"]:
+        invalidate_public("blog")
+        changed = [item["id"] for item in result["results"] if item["status"] == "ok"]
+        if input.action == "publish":
+            async for post in db.blog_posts.find({"id": {"$in": changed}}, SEARCH_PROJECTION):
+                index_post(post)
+        else:
+            for post_id in changed:
+                search_index.remove(post_id)
+        related_job.trigger()
+    return result
+
 # ==================== ADMIN CONTACT MANAGEMENT ====================
 
-@api_router.get("/admin/contacts", response_model=List[ContactMessage])
-async def admin_get_contacts(current_user: dict = Depends(get_current_admin)):
-    contacts = await db.contact_messages.find({}, {"_id": 0}).sort("created_at", -1).to_list(200)
-    for c in contacts:
-        if isinstance(c.get('created_at'), str):
-            c['created_at'] = datetime.fromisoformat(c['created_at'])
-    return contacts
+@api_router.get("/admin/contacts", response_model=Page[ContactMessage])
+async def admin_get_contacts(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin),
+):
+    return await stream_page(page_cursor(db.contact_messages, {}, limit, cursor, CONTACT_PROJECTION), limit)
+
+@api_router.get("/admin/contacts/export")
+async def admin_export_contacts(
+    format: Literal["csv", "ndjson"] = "csv",
+    since: Optional[datetime] = Query(None, description="Only messages created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only messages created before this time"),
+    is_read: Optional[bool] = None,
+    current_user: dict = Depends(get_current_admin),
+):
+    query = {}
+    if since or until:
+        created_at = {}
+        if since:
+            created_at["$gte"] = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+        if until:
+            created_at["$lt"] = until if until.tzinfo else until.replace(tzinfo=timezone.utc)
+        query["created_at"] = created_at
+    if is_read is not None:
+        query["is_read"] = is_read
+    
+    # Sorted on created_at alone so both the (is_read, created_at) and (created_at, id) indexes
+    # can serve it without an in-memory sort; rows are streamed in cursor batches
+    cursor = db.contact_messages.find(query, CONTACT_PROJECTION).sort("created_at", -1)
+    filename = f"contacte-{datetime.now(timezone.utc).strftime('%Y%m%d')}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "csv":
+        fields = [name for name in CONTACT_PROJECTION if name != "_id"]
+        return StreamingResponse(iter_csv(cursor, fields), media_type="text/csv; charset=utf-8", headers=headers)
+    return StreamingResponse(iter_ndjson(cursor), media_type="application/x-ndjson", headers=headers)
 
 @api_router.put("/admin/contacts/{contact_id}/read")
 async def admin_mark_contact_read(contact_id: str, current_user: dict = Depends(get_current_admin)):
@@ -404,22 +925,31 @@ async def admin_delete_contact(contact_id: str, current_user: dict = Depends(get
         raise HTTPException(status_code=404, detail="Contact not found")
     return {"message": "Contact deleted"}
 
+@api_router.post("/admin/contacts/bulk", response_model=BulkResult)
+async def admin_bulk_contacts(input: ContactBulkRequest, current_user: dict = Depends(get_current_admin)):
+    update = {
+        "mark_read": {"$set": {"is_read": True}},
+        "mark_unread": {"$set": {"is_read": False}},
+        "delete": None,
+    }[input.action]
+    return await run_bulk(db.contact_messages, input, update)
+
 # ==================== ADMIN TESTIMONIALS ====================
 
-@api_router.get("/admin/testimonials", response_model=List[Testimonial])
-async def admin_get_testimonials(current_user: dict = Depends(get_current_admin)):
-    testimonials = await db.testimonials.find({}, {"_id": 0}).to_list(100)
-    for t in testimonials:
-        if isinstance(t.get('created_at'), str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
-    return testimonials
+@api_router.get("/admin/testimonials", response_model=Page[Testimonial])
+async def admin_get_testimonials(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin),
+):
+    return await stream_page(page_cursor(db.testimonials, {}, limit, cursor, TESTIMONIAL_PROJECTION), limit)
 
 @api_router.post("/admin/testimonials", response_model=Testimonial)
 async def admin_create_testimonial(input: TestimonialCreate, current_user: dict = Depends(get_current_admin)):
     testimonial = Testimonial(**input.model_dump())
     doc = testimonial.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.testimonials.insert_one(doc)
+    invalidate_public("testimonials")
     return testimonial
 
 @api_router.delete("/admin/testimonials/{testimonial_id}")
@@ -427,24 +957,37 @@ async def admin_delete_testimonial(testimonial_id: str, current_user: dict = Dep
     result = await db.testimonials.delete_one({"id": testimonial_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    invalidate_public("testimonials")
     return {"message": "Testimonial deleted"}
 
+@api_router.post("/admin/testimonials/bulk", response_model=BulkResult)
+async def admin_bulk_testimonials(input: TestimonialBulkRequest, current_user: dict = Depends(get_current_admin)):
+    update = {
+        "activate": {"$set": {"is_active": True}},
+        "deactivate": {"$set": {"is_active": False}},
+        "delete": None,
+    }[input.action]
+    result = await run_bulk(db.testimonials, input, update)
+    if result["matched"]:
+        invalidate_public("testimonials")
+    return result
+
 # ==================== ADMIN PROJECTS ====================
 
-@api_router.get("/admin/projects", response_model=List[Project])
-async def admin_get_projects(current_user: dict = Depends(get_current_admin)):
-    projects = await db.projects.find({}, {"_id": 0}).to_list(100)
-    for p in projects:
-        if isinstance(p.get('created_at'), str):
-            p['created_at'] = datetime.fromisoformat(p['created_at'])
-    return projects
+@api_router.get("/admin/projects", response_model=Page[Project])
+async def admin_get_projects(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin),
+):
+    return await stream_page(page_cursor(db.projects, {}, limit, cursor, PROJECT_PROJECTION), limit)
 
 @api_router.post("/admin/projects", response_model=Project)
 async def admin_create_project(input: ProjectCreate, current_user: dict = Depends(get_current_admin)):
     project = Project(**input.model_dump())
     doc = project.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.projects.insert_one(doc)
+    invalidate_public("projects")
     return project
 
 @api_router.delete("/admin/projects/{project_id}")
@@ -452,11 +995,35 @@ async def admin_delete_project(project_id: str, current_user: dict = Depends(get
     result = await db.projects.delete_one({"id": project_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    invalidate_public("projects")
     return {"message": "Project deleted"}
 
+@api_router.post("/admin/projects/bulk", response_model=BulkResult)
+async def admin_bulk_projects(input: ProjectBulkRequest, current_user: dict = Depends(get_current_admin)):
+    update = {
+        "feature": {"$set": {"is_featured": True}},
+        "unfeature": {"$set": {"is_featured": False}},
+        "delete": None,
+    }[input.action]
+    result = await run_bulk(db.projects, input, update)
+    if result["matched"]:
+        invalidate_public("projects")
+    return result
+
 # Include the router in the main app
 app.include_router(api_router)
 
+rate_limit_backend = MongoBackend(db.rate_limits) if RATE_LIMIT_BACKEND == 'mongo' else MemoryBackend()
+
+if RATE_LIMIT_ENABLED:
+    # Added before CORS so 429 responses still carry the CORS headers the frontend needs to read them
+    app.add_middleware(
+        RateLimitMiddleware,
+        backend=rate_limit_backend,
+        rules=RATE_LIMIT_RULES,
+        trust_forwarded_for=RATE_LIMIT_TRUST_FORWARDED_FOR,
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -465,6 +1032,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Inside RequestDbTimeMiddleware, so the header can include the request's MongoDB time
+app.add_middleware(ServerTimingMiddleware, always=SERVER_TIMING_ENABLED, authorize=is_admin_token)
+
+# Sums MongoDB time per request; requests over MONGO_SLOW_REQUEST_MS of DB time are logged
+app.add_middleware(
+    RequestDbTimeMiddleware,
+    monitor=command_monitor,
+    slow_request_ms=float(os.environ.get('MONGO_SLOW_REQUEST_MS', '250')),
+)
+
+# Outermost, so the latency covers every other middleware and in-flight counts are exact
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
+@app.on_event("startup")
+async def apply_migrations():
+    if not RUN_MIGRATIONS_ON_STARTUP:
+        return
+    try:
+        applied = await run_migrations(db)
+    except Exception as e:
+        # The routes rely on what the migrations set up (unique slug index, BSON dates),
+        # so refuse to start rather than serve against a half-migrated database
+        logger.error(f"Failed to apply migrations, aborting startup: {str(e)}")
+        raise
+    if applied:
+        logger.info(f"Applied migrations: {applied}")
+
+@app.on_event("startup")
+async def start_email_outbox():
+    if email_outbox:
+        email_outbox.watch(db.contact_messages, contact_notification, "contact_id")
+        email_outbox.start()
+
+async def load_search_index():
+    return await search_index.reload(
+        lambda: db.blog_posts.find({"published": True}, SEARCH_PROJECTION).to_list(None)
+    )
+
+async def refresh_search_index_periodically():
+    while True:
+        await asyncio.sleep(SEARCH_REFRESH_SECONDS)
+        try:
+            await load_search_index()
+        except Exception as e:
+            logger.error(f"Failed to refresh search index: {str(e)}")
+
+@app.on_event("startup")
+async def build_search_index():
+    global search_refresh_task
+    try:
+        count = await load_search_index()
+        logger.info(f"Search index built with {count} posts")
+    except Exception as e:
+        logger.error(f"Failed to build search index: {str(e)}")
+    if SEARCH_REFRESH_SECONDS > 0:
+        search_refresh_task = asyncio.create_task(
+            refresh_search_index_periodically(), context=contextvars.Context()
+        )
+
+@app.on_event("startup")
+async def start_view_counter():
+    view_counter.start()
+
+@app.on_event("startup")
+async def refresh_related_posts():
+    # Fills in `related` for posts stored before the job existed; writes nothing when all are current
+    related_job.trigger()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if search_refresh_task:
+        search_refresh_task.cancel()
+    if email_outbox:
+        await email_outbox.stop()
+    await view_counter.stop()
+    await related_job.wait()
+    password_hasher.shutdown()
     client.close()
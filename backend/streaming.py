@@ -0,0 +1,78 @@
+"""
+Streaming JSON responses encoded straight off a Motor cursor.
+
+Instead of `to_list()` + serialize-the-whole-array, documents are encoded as
+they arrive and flushed once per cursor batch, so the first bytes leave after
+the first batch and memory stays flat whatever the page size.
+
+The status line goes out before the body is iterated. `stream_page` therefore
+reads the first batch before building the response, so a failing query (bad
+cursor, Mongo unreachable) is still a clean error response. An error on a
+later batch can only cut the body short: the client sees a 200 with truncated,
+unparseable JSON, and the error is logged server-side.
+"""
+
+from typing import AsyncIterator, List
+
+from pydantic_core import to_json
+from starlette.responses import StreamingResponse
+
+from pagination import encode_cursor
+
+STREAM_BATCH_SIZE = 100
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamingJSONResponse(StreamingResponse):
+    media_type = "application/json"
+
+
+async def _take(docs, n: int) -> List[dict]:
+    taken = []
+    while len(taken) < n:
+        try:
+            taken.append(await docs.__anext__())
+        except StopAsyncIteration:
+            break
+    return taken
+
+
+async def iter_page(first: List[dict], docs, limit: int) -> AsyncIterator[bytes]:
+    """Encode a `Page` ({"items": [...], "next_cursor": ...}) from up to limit + 1 documents:
+    the prefetched `first` batch, then the rest of the `docs` iterator."""
+    chunk = bytearray(b'{"items":[')
+    count = 0
+    last = None
+    has_more = False
+
+    async def remaining():
+        for doc in first:
+            yield doc
+        if len(first) <= limit:
+            async for doc in docs:
+                yield doc
+
+    async for doc in remaining():
+        if count == limit:
+            has_more = True
+            break
+        if count:
+            chunk += b","
+        chunk += to_json(doc)
+        count += 1
+        last = doc
+        if count % STREAM_BATCH_SIZE == 0 or len(chunk) >= CHUNK_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+    next_cursor = encode_cursor(last) if has_more else None
+    chunk += b'],"next_cursor":' + to_json(next_cursor) + b"}"
+    yield bytes(chunk)
+
+
+async def stream_page(cursor, limit: int) -> StreamingJSONResponse:
+    """Stream a page from a cursor yielding up to limit + 1 documents (see `pagination.page_cursor`)."""
+    batch_size = min(limit + 1, STREAM_BATCH_SIZE)
+    docs = cursor.batch_size(batch_size).__aiter__()
+    # Runs the query now: if it fails, the route raises before any status line is sent
+    first = await _take(docs, batch_size)
+    return StreamingJSONResponse(iter_page(first, docs, limit))
@@ -0,0 +1,112 @@
+"""
+`Server-Timing` response header: a per-request breakdown that browser devtools
+show in the Timing tab.
+
+`ServerTimingMiddleware` opens a `ServerTiming` for the request in a context
+variable. Code wraps its phases in `timed("auth")`, `timed("serialize")` and
+so on, and the middleware adds MongoDB time (from `mongo_monitoring`) and the
+total when the response starts. With no timing open, `timed` only costs a
+context variable lookup.
+
+Timing is on for every request when SERVER_TIMING_ENABLED is set. Otherwise an
+admin can turn it on for one request with the `X-Server-Timing: 1` header,
+carrying their usual bearer token.
+"""
+
+import contextvars
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from mongo_monitoring import request_db_time
+
+REQUEST_HEADER = b"x-server-timing"
+
+
+class ServerTiming:
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items()]
+        db = request_db_time.get()
+        if db is not None and db.commands:
+            entries.append(f'db;dur={db.seconds * 1000:.1f};desc="{db.commands} commands"')
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+current_timing: contextvars.ContextVar[Optional[ServerTiming]] = contextvars.ContextVar(
+    "current_timing", default=None
+)
+
+
+class timed:
+    """`with timed("auth"): ...` adds the block's wall time to the request's Server-Timing, if one is open."""
+    __slots__ = ("name", "timing", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timing = current_timing.get()
+
+    def __enter__(self):
+        if self.timing is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timing is not None:
+            self.timing.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+async def timed_await(name: str, awaitable: Awaitable):
+    """`timed` for one awaitable, e.g. a single branch of an asyncio.gather."""
+    with timed(name):
+        return await awaitable
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app, always: bool, authorize: Callable[[str], Awaitable[bool]]):
+        self.app = app
+        self.always = always
+        self.authorize = authorize  # bearer token -> is an admin
+
+    async def _requested_by_admin(self, scope) -> bool:
+        requested = token = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_HEADER:
+                requested = value
+            elif name == b"authorization":
+                token = value.decode("latin-1")
+        if requested not in (b"1", b"true") or not token or not token.lower().startswith("bearer "):
+            return False
+        return await self.authorize(token[7:])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self.always or await self._requested_by_admin(scope)):
+            return await self.app(scope, receive, send)
+
+        timing = ServerTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header(time.perf_counter() - start).encode()))
+                for name, value in scope["headers"]:
+                    if name == b"origin":
+                        # Lets the frontend origin read the entries through the Resource Timing API
+                        headers.append((b"timing-allow-origin", value))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_timing.reset(token)
@@ -0,0 +1,94 @@
+"""
+Write-behind view counters for blog posts.
+
+Public reads only bump an in-memory counter; a background task flushes the
+accumulated counts every `flush_interval` seconds as a single unordered
+`bulk_write` of `$inc` operations, so page views never turn into one write per
+hit. Counts that fail to flush are merged back and retried on the next tick,
+and `stop()` drains whatever is left on shutdown.
+"""
+
+import asyncio
+import contextvars
+import logging
+from collections import Counter
+from typing import Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, collection, field: str = "view_count", key: str = "slug",
+                 flush_interval: float = 5.0):
+        self.collection = collection
+        self.field = field
+        self.key = key
+        self.flush_interval = flush_interval
+        self._pending: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.flushes = 0
+        self.flushed_views = 0
+        self.failed_flushes = 0
+
+    def record(self, key_value: str, views: int = 1) -> None:
+        self._pending[key_value] += views
+
+    def pending(self) -> int:
+        return sum(self._pending.values())
+
+    def stats(self) -> dict:
+        return {
+            "pending_views": self.pending(),
+            "pending_keys": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_views": self.flushed_views,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    async def flush(self) -> int:
+        """Write out the accumulated counts. Returns how many views were flushed."""
+        if not self._pending:
+            return 0
+        # Swap first: views recorded while the write is in flight go to the next batch
+        batch, self._pending = self._pending, Counter()
+        ops = [UpdateOne({self.key: k}, {"$inc": {self.field: n}}) for k, n in batch.items()]
+        try:
+            await self.collection.bulk_write(ops, ordered=False)
+        except Exception:
+            self.failed_flushes += 1
+            self._pending.update(batch)
+            raise
+        flushed = sum(batch.values())
+        self.flushes += 1
+        self.flushed_views += flushed
+        return flushed
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Not cancelled: a flush in progress finishes, so no batch is half-written or counted twice
+            self._stopping.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {self.pending()} pending views on shutdown: {str(e)}")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"View counter flush failed, will retry: {str(e)}")
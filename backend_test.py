@@ -122,6 +122,14 @@ class BCONAPITester:
         success, data, details = self.make_request('GET', 'blog')
         self.log_test("Get published blog posts", success, details)
         
+        # Paginated response envelope
+        success, data, details = self.make_request('GET', 'blog?limit=1')
+        self.log_test("Blog posts paginated", success and 'items' in data and 'next_cursor' in data, details)
+        
+        # Malformed cursor is rejected
+        success, data, details = self.make_request('GET', 'blog?cursor=not-a-cursor', expected_status=400)
+        self.log_test("Blog posts invalid cursor (400 expected)", success, details)
+        
         # Test blog post by slug (will likely 404 since no posts exist)
         success, data, details = self.make_request('GET', 'blog/test-slug', expected_status=404)
         self.log_test("Get blog post by slug (404 expected)", success, details)
@@ -47,7 +47,16 @@ const AdminLayout = () => {
     checkAuth();
   }, [navigate]);
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    const token = localStorage.getItem("admin_token");
+    try {
+      // Revokes every token issued to this admin, not just the local copy
+      await axios.post(`${API}/admin/logout`, {}, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+    } catch (error) {
+      console.error("Logout failed:", error);
+    }
     localStorage.removeItem("admin_token");
     navigate("/admin/login");
   };
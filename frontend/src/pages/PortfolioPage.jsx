@@ -67,9 +67,9 @@ const PortfolioPage = () => {
   useEffect(() => {
     const fetchProjects = async () => {
       try {
-        const response = await axios.get(`${API}/projects`);
-        if (response.data.length > 0) {
-          setProjects(response.data);
+        const response = await axios.get(`${API}/projects`, { params: { limit: 100 } });
+        if (response.data.items.length > 0) {
+          setProjects(response.data.items);
         } else {
           setProjects(placeholderProjects);
         }
@@ -30,6 +30,7 @@ import { toast } from "sonner";
 import axios from "axios";
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const PAGE_SIZE = 100;
 
 const AdminDashboard = () => {
   const { user } = useOutletContext();
@@ -38,7 +39,11 @@ const AdminDashboard = () => {
   const [contacts, setContacts] = useState([]);
   const [projects, setProjects] = useState([]);
   const [testimonials, setTestimonials] = useState([]);
+  const [counts, setCounts] = useState({});
   const [loading, setLoading] = useState(true);
+  // next_cursor of each list; null once the last page is loaded
+  const [cursors, setCursors] = useState({});
+  const [loadingMore, setLoadingMore] = useState(null);
 
   // Blog form state
   const [blogForm, setBlogForm] = useState({
@@ -92,17 +97,20 @@ const AdminDashboard = () => {
 
   const fetchAllData = async () => {
     try {
-      const [postsRes, contactsRes, projectsRes, testimonialsRes] = await Promise.all([
-        axios.get(`${API}/admin/blog`, { headers: getAuthHeaders() }),
-        axios.get(`${API}/admin/contacts`, { headers: getAuthHeaders() }),
-        axios.get(`${API}/admin/projects`, { headers: getAuthHeaders() }),
-        axios.get(`${API}/admin/testimonials`, { headers: getAuthHeaders() })
-      ]);
+      const response = await axios.get(`${API}/admin/dashboard`, { headers: getAuthHeaders() });
+      const { posts, contacts, projects, testimonials, counts } = response.data;
       
-      setBlogPosts(postsRes.data);
-      setContacts(contactsRes.data);
-      setProjects(projectsRes.data);
-      setTestimonials(testimonialsRes.data);
+      setBlogPosts(posts.items);
+      setContacts(contacts.items);
+      setProjects(projects.items);
+      setTestimonials(testimonials.items);
+      setCursors({
+        blog: posts.next_cursor,
+        contacts: contacts.next_cursor,
+        projects: projects.next_cursor,
+        testimonials: testimonials.next_cursor
+      });
+      setCounts(counts);
     } catch (error) {
       console.error("Error fetching data:", error);
       toast.error("Eroare la încărcarea datelor");
@@ -111,14 +119,80 @@ const AdminDashboard = () => {
     }
   };
 
+  // Older pages come from the list routes, following the cursor of the last page loaded
+  const listSetters = {
+    blog: setBlogPosts,
+    contacts: setContacts,
+    projects: setProjects,
+    testimonials: setTestimonials
+  };
+
+  const loadMore = async (list) => {
+    setLoadingMore(list);
+    try {
+      const response = await axios.get(`${API}/admin/${list}`, {
+        headers: getAuthHeaders(),
+        params: { cursor: cursors[list], limit: PAGE_SIZE }
+      });
+      listSetters[list]((items) => [...items, ...response.data.items]);
+      setCursors((current) => ({ ...current, [list]: response.data.next_cursor }));
+    } catch (error) {
+      toast.error("Eroare la încărcarea datelor");
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
+  // Mutations patch the loaded lists in place, so pages loaded with "load more" stay on screen
+  const updateList = (list, update) => {
+    listSetters[list](update);
+    refreshCounts();
+  };
+
+  const refreshCounts = async () => {
+    try {
+      const response = await axios.get(`${API}/admin/dashboard/counts`, { headers: getAuthHeaders() });
+      setCounts(response.data);
+    } catch (error) {
+      console.error("Error fetching counts:", error);
+    }
+  };
+
+  const lists = { blog: blogPosts, contacts, projects, testimonials };
+  const listTotals = {
+    blog: counts.posts_total,
+    contacts: counts.contacts_total,
+    projects: counts.projects_total,
+    testimonials: counts.testimonials_total
+  };
+
+  const renderLoadMore = (list) => cursors[list] ? (
+    <div className="p-4 text-center border-t border-slate-200">
+      {listTotals[list] !== undefined && (
+        <p className="text-sm text-slate-500 mb-3">
+          Afișate {lists[list].length} din {listTotals[list]}
+        </p>
+      )}
+      <Button
+        variant="outline"
+        className="rounded-none"
+        onClick={() => loadMore(list)}
+        disabled={loadingMore === list}
+        data-testid={`admin-load-more-${list}`}
+      >
+        {loadingMore === list ? "Se încarcă..." : "Încarcă mai multe"}
+      </Button>
+    </div>
+  ) : null;
+
   // Blog handlers
   const handleCreateBlogPost = async () => {
     try {
-      await axios.post(`${API}/admin/blog`, blogForm, { headers: getAuthHeaders() });
+      const response = await axios.post(`${API}/admin/blog`, blogForm, { headers: getAuthHeaders() });
       toast.success("Articol creat cu succes!");
       setBlogDialogOpen(false);
       setBlogForm({ title: "", slug: "", excerpt: "", content: "", image_url: "", category: "", published: false });
-      fetchAllData();
+      updateList("blog", (posts) => [response.data, ...posts]);
     } catch (error) {
       toast.error(error.response?.data?.detail || "Eroare la crearea articolului");
     }
@@ -129,7 +203,7 @@ const AdminDashboard = () => {
     try {
       await axios.delete(`${API}/admin/blog/${postId}`, { headers: getAuthHeaders() });
       toast.success("Articol șters!");
-      fetchAllData();
+      updateList("blog", (posts) => posts.filter((p) => p.id !== postId));
     } catch (error) {
       toast.error("Eroare la ștergerea articolului");
     }
@@ -142,7 +216,7 @@ const AdminDashboard = () => {
         { headers: getAuthHeaders() }
       );
       toast.success(post.published ? "Articol depublicat" : "Articol publicat!");
-      fetchAllData();
+      updateList("blog", (posts) => posts.map((p) => p.id === post.id ? { ...p, published: !post.published } : p));
     } catch (error) {
       toast.error("Eroare la actualizarea articolului");
     }
@@ -152,7 +226,7 @@ const AdminDashboard = () => {
   const handleMarkRead = async (contactId) => {
     try {
       await axios.put(`${API}/admin/contacts/${contactId}/read`, {}, { headers: getAuthHeaders() });
-      fetchAllData();
+      updateList("contacts", (items) => items.map((c) => c.id === contactId ? { ...c, is_read: true } : c));
     } catch (error) {
       toast.error("Eroare la marcarea ca citit");
     }
@@ -163,7 +237,7 @@ const AdminDashboard = () => {
     try {
       await axios.delete(`${API}/admin/contacts/${contactId}`, { headers: getAuthHeaders() });
       toast.success("Mesaj șters!");
-      fetchAllData();
+      updateList("contacts", (items) => items.filter((c) => c.id !== contactId));
     } catch (error) {
       toast.error("Eroare la ștergerea mesajului");
     }
@@ -172,11 +246,11 @@ const AdminDashboard = () => {
   // Testimonial handlers
   const handleCreateTestimonial = async () => {
     try {
-      await axios.post(`${API}/admin/testimonials`, testimonialForm, { headers: getAuthHeaders() });
+      const response = await axios.post(`${API}/admin/testimonials`, testimonialForm, { headers: getAuthHeaders() });
       toast.success("Testimonial adăugat!");
       setTestimonialDialogOpen(false);
       setTestimonialForm({ client_name: "", company: "", role: "", content: "", rating: 5, is_active: true });
-      fetchAllData();
+      updateList("testimonials", (items) => [response.data, ...items]);
     } catch (error) {
       toast.error("Eroare la adăugarea testimonialului");
     }
@@ -187,7 +261,7 @@ const AdminDashboard = () => {
     try {
       await axios.delete(`${API}/admin/testimonials/${testimonialId}`, { headers: getAuthHeaders() });
       toast.success("Testimonial șters!");
-      fetchAllData();
+      updateList("testimonials", (items) => items.filter((t) => t.id !== testimonialId));
     } catch (error) {
       toast.error("Eroare la ștergerea testimonialului");
     }
@@ -196,11 +270,11 @@ const AdminDashboard = () => {
   // Project handlers
   const handleCreateProject = async () => {
     try {
-      await axios.post(`${API}/admin/projects`, projectForm, { headers: getAuthHeaders() });
+      const response = await axios.post(`${API}/admin/projects`, projectForm, { headers: getAuthHeaders() });
       toast.success("Proiect adăugat!");
       setProjectDialogOpen(false);
       setProjectForm({ title: "", description: "", challenge: "", solution: "", results: "", category: "", image_url: "", year: "", is_featured: false });
-      fetchAllData();
+      updateList("projects", (items) => [response.data, ...items]);
     } catch (error) {
       toast.error("Eroare la adăugarea proiectului");
     }
@@ -211,17 +285,17 @@ const AdminDashboard = () => {
     try {
       await axios.delete(`${API}/admin/projects/${projectId}`, { headers: getAuthHeaders() });
       toast.success("Proiect șters!");
-      fetchAllData();
+      updateList("projects", (items) => items.filter((p) => p.id !== projectId));
     } catch (error) {
       toast.error("Eroare la ștergerea proiectului");
     }
   };
 
   const stats = [
-    { label: "Articole Blog", value: blogPosts.length, icon: FileText, color: "bg-blue-500" },
-    { label: "Mesaje noi", value: contacts.filter(c => !c.is_read).length, icon: MessageSquare, color: "bg-green-500" },
-    { label: "Proiecte", value: projects.length, icon: FolderOpen, color: "bg-purple-500" },
-    { label: "Testimoniale", value: testimonials.length, icon: Star, color: "bg-yellow-500" }
+    { label: "Articole Blog", value: counts.posts_total ?? blogPosts.length, icon: FileText, color: "bg-blue-500" },
+    { label: "Mesaje noi", value: counts.contacts_unread ?? contacts.filter(c => !c.is_read).length, icon: MessageSquare, color: "bg-green-500" },
+    { label: "Proiecte", value: counts.projects_total ?? projects.length, icon: FolderOpen, color: "bg-purple-500" },
+    { label: "Testimoniale", value: counts.testimonials_total ?? testimonials.length, icon: Star, color: "bg-yellow-500" }
   ];
 
   const tabs = [
@@ -415,6 +489,7 @@ const AdminDashboard = () => {
                 ))}
               </div>
             )}
+            {renderLoadMore("blog")}
           </div>
         </div>
       )}
@@ -467,6 +542,7 @@ const AdminDashboard = () => {
                 ))}
               </div>
             )}
+            {renderLoadMore("contacts")}
           </div>
         </div>
       )}
@@ -599,6 +675,7 @@ const AdminDashboard = () => {
                 ))}
               </div>
             )}
+            {renderLoadMore("projects")}
           </div>
         </div>
       )}
@@ -697,6 +774,7 @@ const AdminDashboard = () => {
                 ))}
               </div>
             )}
+            {renderLoadMore("testimonials")}
           </div>
         </div>
       )}
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+# The backend is run from its own directory (uvicorn server:app), so its modules import each other flat
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from timing import timed  # noqa: E402
+
+
+@pytest.fixture
+def middleware_client():
+    """Build a TestClient for a throwaway app with one middleware around a few stand-in routes."""
+    def make(middleware_class, **options):
+        app = FastAPI()
+
+        @app.post("/api/contact")
+        async def contact():
+            return {"ok": True}
+
+        @app.get("/api/blog")
+        async def blog():
+            return []
+
+        @app.get("/api/blog/{slug}")
+        async def post(slug: str):
+            if slug == "broken":
+                raise HTTPException(status_code=503)
+            return {"slug": slug}
+
+        @app.get("/api/dashboard")
+        async def dashboard():
+            with timed("auth"):
+                pass
+            with timed("serialize"):
+                pass
+            return {"ok": True}
+
+        app.add_middleware(middleware_class, **options)
+        return TestClient(app)
+
+    return make
+
+
+@pytest.fixture
+def server_client():
+    """TestClient for the real app (startup hooks stay off), with fresh rate limit buckets."""
+    import server
+
+    if hasattr(server.rate_limit_backend, "clear"):
+        server.rate_limit_backend.clear()
+    return TestClient(server.app)
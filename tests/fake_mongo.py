@@ -0,0 +1,178 @@
+"""
+A small in-memory stand-in for a Motor collection.
+
+Supports only what the modules under test use: equality (dotted paths too) and
+the $lt/$lte/$gt/$gte/$in/$exists/$or operators in filters, $set/$inc updates,
+and unique `_id`s.
+"""
+
+import copy
+from datetime import datetime
+from types import SimpleNamespace
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+UpdateResult = SimpleNamespace
+
+_COMPARISONS = {
+    "$lt": lambda value, bound: value < bound,
+    "$lte": lambda value, bound: value <= bound,
+    "$gt": lambda value, bound: value > bound,
+    "$gte": lambda value, bound: value >= bound,
+}
+
+
+def _comparable(value, bound) -> bool:
+    # MongoDB only compares values of the same type (null never matches a date range)
+    if isinstance(bound, datetime):
+        return isinstance(value, datetime)
+    return isinstance(value, (int, float)) and isinstance(bound, (int, float))
+
+
+def _matches_value(value, condition) -> bool:
+    if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+        for op, operand in condition.items():
+            if op in _COMPARISONS:
+                if not _comparable(value, operand) or not _COMPARISONS[op](value, operand):
+                    return False
+            elif op == "$in":
+                if value not in operand:
+                    return False
+            elif op == "$exists":
+                if (value is not None) != operand:
+                    return False
+            else:
+                raise NotImplementedError(op)
+        return True
+    return value == condition
+
+
+def _get(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif not _matches_value(_get(doc, key), condition):
+            return False
+    return True
+
+
+def apply_update(doc: dict, update: dict) -> None:
+    for op, fields in update.items():
+        if op == "$set":
+            for key, value in fields.items():
+                *parents, last = key.split(".")
+                target = doc
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[last] = copy.deepcopy(value)
+        elif op == "$inc":
+            for key, amount in fields.items():
+                doc[key] = doc.get(key, 0) + amount
+        else:
+            raise NotImplementedError(op)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=None):
+        keys = [(key, direction)] if isinstance(key, str) else key
+        for field, order in reversed(keys):
+            self._docs.sort(key=lambda d: d.get(field), reverse=order == -1)
+        return self
+
+    async def to_list(self, length):
+        return self._docs if length is None else self._docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = [copy.deepcopy(doc) for doc in docs]
+        self.fail = None  # set to an exception to make every call raise it
+
+    def _check(self):
+        if self.fail is not None:
+            raise self.fail
+
+    def _insert(self, doc):
+        if "_id" in doc and any(d.get("_id") == doc["_id"] for d in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_one(self, doc):
+        self._check()
+        self._insert(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        self._check()
+        errors = []
+        for index, doc in enumerate(docs):
+            try:
+                self._insert(doc)
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    def find(self, query=None, projection=None):
+        self._check()
+        return FakeCursor([copy.deepcopy(d) for d in self.docs if matches(d, query or {})])
+
+    async def find_one(self, query=None, projection=None):
+        self._check()
+        return next((copy.deepcopy(d) for d in self.docs if matches(d, query or {})), None)
+
+    async def find_one_and_update(self, query, update, sort=None, return_document=ReturnDocument.BEFORE, **kwargs):
+        self._check()
+        candidates = FakeCursor([d for d in self.docs if matches(d, query)])
+        if sort:
+            candidates.sort(sort)
+        docs = await candidates.to_list(1)
+        if not docs:
+            return None
+        before = copy.deepcopy(docs[0])
+        apply_update(docs[0], update)
+        return copy.deepcopy(docs[0]) if return_document == ReturnDocument.AFTER else before
+
+    async def update_one(self, query, update):
+        self._check()
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update)
+                return UpdateResult(matched_count=1, modified_count=1)
+        return UpdateResult(matched_count=0, modified_count=0)
+
+    async def delete_one(self, query):
+        self._check()
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return
+
+    async def delete_many(self, query):
+        self._check()
+        self.docs = [d for d in self.docs if not matches(d, query)]
+
+    async def count_documents(self, query):
+        self._check()
+        return sum(1 for d in self.docs if matches(d, query))
@@ -0,0 +1,154 @@
+"""
+Admin token verification and revocation through per-user token epochs.
+"""
+
+import asyncio
+import time
+
+import jwt
+import pytest
+
+from auth import EpochCache, TokenRejected, TokenVerifier
+from tests.fake_mongo import FakeCollection
+
+SECRET = "test-secret"
+ADMIN = {"id": "admin-1", "email": "admin@bcon.ro", "name": "Admin", "token_epoch": 0}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_verifier(users=(ADMIN,), refresh_interval=30.0):
+    clock = FakeClock()
+    collection = FakeCollection(users)
+    verifier = TokenVerifier(SECRET, "HS256", EpochCache(collection, refresh_interval=refresh_interval, clock=clock))
+    return verifier, collection, clock
+
+
+def verify(verifier, token):
+    return asyncio.run(verifier.verify(token))
+
+
+def rejection(verifier, token) -> str:
+    with pytest.raises(TokenRejected) as exc:
+        verify(verifier, token)
+    return exc.value.detail
+
+
+def test_valid_token_returns_the_profile():
+    verifier, _, _ = make_verifier()
+    token = verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0)
+
+    assert verify(verifier, token) == {"id": "admin-1", "email": "admin@bcon.ro", "name": "Admin"}
+
+
+def test_local_logout_revokes_immediately():
+    verifier, _, _ = make_verifier()
+    token = verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0)
+    verify(verifier, token)
+
+    verifier.epochs.set("admin-1", 1)
+
+    assert rejection(verifier, token) == "Token revoked"
+    assert verify(verifier, verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=1))["id"] == "admin-1"
+
+
+def test_logout_on_another_worker_is_honoured_after_the_refresh_interval():
+    verifier, collection, clock = make_verifier(refresh_interval=30.0)
+    token = verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0)
+    verify(verifier, token)
+    collection.docs[0]["token_epoch"] = 1
+
+    clock.now += 29
+    assert verify(verifier, token)["id"] == "admin-1"
+    assert verifier.epochs.refreshes == 1
+
+    clock.now += 2
+    assert rejection(verifier, token) == "Token revoked"
+    assert verifier.epochs.refreshes == 2
+
+
+def test_unknown_user_is_rejected_and_triggers_at_most_one_reload():
+    verifier, _, clock = make_verifier()
+    token = verifier.encode("ghost", "ghost@bcon.ro", "Ghost", epoch=0)
+    verify(verifier, verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0))
+
+    clock.now += 0.5
+    assert rejection(verifier, token) == "User not found"
+    assert verifier.epochs.refreshes == 1
+
+    clock.now += 1
+    assert rejection(verifier, token) == "User not found"
+    assert verifier.epochs.refreshes == 2
+
+
+def test_user_registered_on_another_worker_is_found():
+    verifier, collection, clock = make_verifier()
+    verify(verifier, verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0))
+    collection.docs.append({"id": "admin-2", "email": "ion@bcon.ro", "name": "Ion", "token_epoch": 0})
+
+    clock.now += 2
+    assert verify(verifier, verifier.encode("admin-2", "ion@bcon.ro", "Ion", epoch=0))["id"] == "admin-2"
+
+
+@pytest.mark.parametrize("missing", ["ep", "name", "sub"])
+def test_tokens_without_profile_claims_are_rejected(missing):
+    verifier, _, _ = make_verifier()
+    claims = {"sub": "admin-1", "email": "admin@bcon.ro", "name": "Admin", "ep": 0, "exp": time.time() + 60}
+    del claims[missing]
+
+    assert rejection(verifier, jwt.encode(claims, SECRET, algorithm="HS256")) == "Invalid token"
+
+
+def test_forged_and_expired_tokens_are_rejected():
+    verifier, _, _ = make_verifier()
+    forged = jwt.encode({"sub": "admin-1", "name": "Admin", "ep": 99}, "other-secret", algorithm="HS256")
+    expired = verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0, ttl_seconds=-1)
+
+    assert rejection(verifier, forged) == "Invalid token"
+    assert rejection(verifier, expired) == "Token expired"
+
+
+class SlowReload(FakeCollection):
+    """A reload that yields to the event loop, then runs `during` before the epochs are stored."""
+
+    def __init__(self, docs, during=None):
+        super().__init__(docs)
+        self.during = during
+
+    def find(self, query=None, projection=None):
+        docs = super().find(query, projection)._docs
+
+        async def iterate():
+            await asyncio.sleep(0)
+            for doc in docs:
+                yield doc
+            if self.during:
+                self.during()
+        return iterate()
+
+
+def test_concurrent_requests_share_one_reload():
+    clock = FakeClock()
+    verifier = TokenVerifier(SECRET, "HS256", EpochCache(SlowReload([ADMIN]), clock=clock))
+    token = verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0)
+
+    async def run():
+        return await asyncio.gather(*(verifier.verify(token) for _ in range(5)))
+
+    assert len(asyncio.run(run())) == 5
+    assert verifier.epochs.refreshes == 1
+
+
+def test_reload_does_not_undo_a_local_logout():
+    clock = FakeClock()
+    epochs = EpochCache(None, clock=clock)
+    epochs.collection = SlowReload([ADMIN], during=lambda: epochs.set("admin-1", 1))
+    verifier = TokenVerifier(SECRET, "HS256", epochs)
+
+    assert rejection(verifier, verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0)) == "Token revoked"
@@ -0,0 +1,23 @@
+"""
+?fields= on the blog index only accepts the optional fields BlogPostSummary declares.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_content_can_be_requested():
+    projection = server.blog_summary_projection("content")
+
+    assert projection["content"] == 1
+    assert "content" not in server.blog_summary_projection(None)
+
+
+@pytest.mark.parametrize("fields", ["outline", "content_html", "related", "content,content_text"])
+def test_fields_outside_the_summary_model_are_refused(fields):
+    with pytest.raises(HTTPException) as exc:
+        server.blog_summary_projection(fields)
+
+    assert exc.value.status_code == 400
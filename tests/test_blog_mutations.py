@@ -0,0 +1,154 @@
+"""
+Round trips issued by the blog mutation routes.
+
+The database is replaced by a recorder that logs every collection command, so
+these tests run without MongoDB and assert on exactly what each request sends.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError
+
+import server
+
+ADMIN = {"id": "admin-1", "email": "admin@bcon.ro", "name": "Admin"}
+
+
+class RecordingCollection:
+    def __init__(self, name, log, results):
+        self.name = name
+        self.log = log
+        self.results = results
+
+    def __getattr__(self, command):
+        async def call(*args, **kwargs):
+            self.log.append((self.name, command))
+            result = self.results.get((self.name, command))
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return call
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.log = []
+        self.results = {}
+        self.related_triggers = 0
+
+    def __getattr__(self, name):
+        return RecordingCollection(name, self.log, self.results)
+
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    db = RecordingDatabase()
+    monkeypatch.setattr(server, "db", db)
+
+    def trigger():
+        db.related_triggers += 1
+    # The related posts job runs in the background; only check that it was scheduled
+    monkeypatch.setattr(server.related_job, "trigger", trigger)
+    server.app.dependency_overrides[server.get_current_admin] = lambda: ADMIN
+    yield db
+    server.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager: startup hooks (migrations, outbox worker) stay off
+    return TestClient(server.app)
+
+
+def stored_post(**overrides):
+    now = datetime.now(timezone.utc)
+    post = {
+        "id": "post-1",
+        "title": "Titlu actualizat",
+        "slug": "articol",
+        "excerpt": "Un rezumat suficient de lung",
+        "content": "x" * 60,
+        "image_url": "",
+        "category": "",
+        "author": "Admin",
+        "published": True,
+        "created_at": now,
+        "updated_at": now,
+    }
+    post.update(overrides)
+    return post
+
+
+NEW_POST = {
+    "title": "Articol nou",
+    "slug": "articol-nou",
+    "excerpt": "Un rezumat suficient de lung",
+    "content": "x" * 60,
+    "published": True,
+}
+
+
+def test_create_post_is_one_round_trip(recording_db, client):
+    response = client.post("/api/admin/blog", json=NEW_POST)
+
+    assert response.status_code == 200
+    assert response.json()["slug"] == "articol-nou"
+    assert recording_db.log == [("blog_posts", "insert_one")]
+    assert recording_db.related_triggers == 1
+
+
+def test_create_post_duplicate_slug_is_rejected_by_the_index(recording_db, client):
+    recording_db.results[("blog_posts", "insert_one")] = DuplicateKeyError("E11000 duplicate key")
+
+    response = client.post("/api/admin/blog", json=NEW_POST)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Slug already exists"
+    assert recording_db.log == [("blog_posts", "insert_one")]
+
+
+def test_update_post_is_one_round_trip(recording_db, client):
+    recording_db.results[("blog_posts", "find_one_and_update")] = stored_post()
+
+    response = client.put("/api/admin/blog/post-1", json={"title": "Titlu actualizat"})
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Titlu actualizat"
+    assert recording_db.log == [("blog_posts", "find_one_and_update")]
+
+
+def test_update_missing_post_is_404_in_one_round_trip(recording_db, client):
+    response = client.put("/api/admin/blog/missing", json={"title": "Titlu actualizat"})
+
+    assert response.status_code == 404
+    assert recording_db.log == [("blog_posts", "find_one_and_update")]
+
+
+def test_update_post_to_taken_slug_is_rejected(recording_db, client):
+    recording_db.results[("blog_posts", "find_one_and_update")] = DuplicateKeyError("E11000 duplicate key")
+
+    response = client.put("/api/admin/blog/post-1", json={"slug": "alt-articol"})
+
+    assert response.status_code == 400
+    assert recording_db.log == [("blog_posts", "find_one_and_update")]
+
+
+@pytest.mark.parametrize("slug", ["search", "popular", "Search"])
+def test_slugs_of_blog_routes_are_rejected(recording_db, client, slug):
+    created = client.post("/api/admin/blog", json={**NEW_POST, "slug": slug})
+    updated = client.put("/api/admin/blog/post-1", json={"slug": slug})
+
+    assert created.status_code == 422
+    assert updated.status_code == 422
+    assert recording_db.log == []
+
+
+def test_every_static_blog_route_is_reserved():
+    static = {
+        route.path.split("/")[3] for route in server.app.routes
+        if route.path.startswith("/api/blog/") and route.path.count("/") == 3 and "{" not in route.path
+    }
+
+    assert static == server.RESERVED_BLOG_SLUGS
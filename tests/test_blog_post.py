@@ -0,0 +1,55 @@
+"""
+Public blog post route: the cached body and its validators.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+from tests.fake_mongo import FakeCollection
+
+UPDATED_AT = datetime(2026, 1, 5, 9, 30, tzinfo=timezone.utc)
+
+
+def post(slug, title, related=()):
+    return {"id": f"id-{slug}", "slug": slug, "title": title, "excerpt": "Un rezumat suficient de lung",
+            "content_html": "<p>Text</p>", "category": "", "image_url": "", "author": "Admin",
+            "published": True, "related": list(related), "created_at": UPDATED_AT, "updated_at": UPDATED_AT}
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.blog_posts = FakeCollection([post("tva", "Declarația de TVA", related=["tva2"]),
+                                          post("tva2", "Rambursarea TVA")])
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(server, "db", database)
+    server.read_cache.clear()
+    yield database
+    server.read_cache.clear()
+
+
+def test_post_is_validated_by_etag_only(database, server_client):
+    first = server_client.get("/api/blog/tva")
+    assert first.status_code == 200
+    assert "last-modified" not in first.headers
+    assert [p["slug"] for p in first.json()["related_posts"]] == ["tva2"]
+
+    # A related post changes; the post's own updated_at does not
+    database.blog_posts.docs[1]["title"] = "Rambursarea TVA în 2026"
+    server.read_cache.clear()
+    response = server_client.get(
+        "/api/blog/tva",
+        headers={"If-Modified-Since": "Mon, 01 Jan 2030 00:00:00 GMT", "If-None-Match": first.headers["etag"]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["related_posts"][0]["title"] == "Rambursarea TVA în 2026"
+    assert server_client.get(
+        "/api/blog/tva", headers={"If-Modified-Since": "Mon, 01 Jan 2030 00:00:00 GMT"}
+    ).status_code == 200
+    assert server_client.get("/api/blog/tva", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
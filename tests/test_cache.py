@@ -0,0 +1,49 @@
+"""
+Read cache: a load racing an invalidation must not store its stale result.
+"""
+
+import asyncio
+
+from cache import TTLCache
+
+
+def test_load_finishing_after_invalidate_is_not_stored():
+    cache = TTLCache()
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_load():
+            started.set()
+            await release.wait()
+            return ["post deleted meanwhile"]
+
+        load = asyncio.create_task(cache.get_or_load(("blog", "published"), slow_load))
+        await started.wait()
+        cache.invalidate("blog")
+        release.set()
+        stale = await load
+
+        async def fresh_load():
+            return []
+        return stale, await cache.get_or_load(("blog", "published"), fresh_load)
+
+    stale, fresh = asyncio.run(scenario())
+
+    assert stale == ["post deleted meanwhile"]
+    assert fresh == []
+    assert cache.stats()["stale_loads"] == 1
+
+
+def test_invalidating_another_namespace_keeps_the_load():
+    cache = TTLCache()
+
+    async def scenario():
+        async def load():
+            cache.invalidate("projects")
+            return "posts"
+        await cache.get_or_load(("blog", "published"), load)
+
+    asyncio.run(scenario())
+
+    assert cache.get(("blog", "published")) == (True, "posts")
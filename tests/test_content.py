@@ -0,0 +1,41 @@
+"""
+Write-time blog content preprocessing.
+"""
+
+from content import preprocess_content
+
+
+def test_sanitizes_html():
+    result = preprocess_content(
+        '<p onclick="steal()">Salut <a href="javascript:alert(1)">aici</a> '
+        '<a href="/servicii">servicii</a></p><script>alert(1)</script><iframe src="x"></iframe>'
+    )
+
+    assert result["content_html"] == (
+        '<p>Salut <a>aici</a> <a href="/servicii" rel="noopener noreferrer">servicii</a></p>'
+    )
+
+
+def test_balances_unclosed_tags():
+    result = preprocess_content("<ul><li>unu<li>doi</ul><p><b>text")
+
+    assert result["content_html"] == "<ul><li>unu</li><li>doi</li></ul><p><b>text</b></p>"
+
+
+def test_outline_gets_unique_anchors():
+    result = preprocess_content("<h1>Ședință</h1><p>a</p><h3>Sedinta</h3><h2></h2>")
+
+    assert result["outline"] == [
+        {"level": 2, "text": "Ședință", "anchor": "sedinta"},
+        {"level": 3, "text": "Sedinta", "anchor": "sedinta-2"},
+    ]
+    assert result["content_html"].startswith('<h2 id="sedinta">Ședință</h2>')
+
+
+def test_plain_text_word_count_and_reading_time():
+    result = preprocess_content("<h2>Titlu</h2><p>" + "cuvânt " * 399 + "</p>")
+
+    assert result["content_text"].startswith("Titlu cuvânt cuvânt")
+    assert result["word_count"] == 400
+    assert result["reading_time"] == 2
+    assert preprocess_content("")["reading_time"] == 0
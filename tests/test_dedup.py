@@ -0,0 +1,131 @@
+"""
+Deduplication of contact submissions: fingerprints, claims and the /contact route.
+"""
+
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import server
+from dedup import Deduplicator, IdempotencyKeyReused, content_fingerprint
+from outbox import EmailOutbox, FakeTransport
+from tests.fake_mongo import FakeCollection
+
+
+def test_fingerprint_ignores_case_diacritics_and_whitespace():
+    original = content_fingerprint("ana@bcon.ro", "Bună ziua,\naș dori o ofertă.")
+    retyped = content_fingerprint("ana@bcon.ro", "  buna ziua, as   dori o OFERTA. ")
+
+    assert original == retyped
+
+
+def test_fingerprint_separates_parts():
+    assert content_fingerprint("ana@bcon.ro", "mesaj") != content_fingerprint("ion@bcon.ro", "mesaj")
+    assert content_fingerprint("a b", "c") != content_fingerprint("a", "b c")
+
+
+def make_dedup(window=600):
+    return Deduplicator(FakeCollection(), scope="contact", window=window, idempotency_ttl=86400)
+
+
+def test_first_claim_is_new_and_repeats_get_the_original():
+    dedup = make_dedup()
+    fingerprint = content_fingerprint("ana@bcon.ro", "mesaj")
+
+    async def run():
+        first = await dedup.claim(fingerprint, {"id": "m-1"})
+        repeat = await dedup.claim(fingerprint, {"id": "m-2"})
+        return first, repeat
+
+    assert asyncio.run(run()) == (None, {"id": "m-1"})
+    assert dedup.duplicates == 1
+
+
+def test_idempotency_key_reused_for_other_content_is_refused():
+    dedup = make_dedup()
+
+    async def run():
+        await dedup.claim(content_fingerprint("ana@bcon.ro", "unu"), {"id": "m-1"}, "key-1")
+        same = await dedup.claim(content_fingerprint("ana@bcon.ro", "unu"), {"id": "m-2"}, "key-1")
+        with pytest.raises(IdempotencyKeyReused):
+            await dedup.claim(content_fingerprint("ana@bcon.ro", "doi"), {"id": "m-3"}, "key-1")
+        return same
+
+    assert asyncio.run(run()) == {"id": "m-1"}
+    # The refused claim did not leave its content fingerprint behind
+    assert {doc["payload"]["id"] for doc in dedup.collection.docs} == {"m-1"}
+
+
+def test_release_frees_the_claims():
+    dedup = make_dedup()
+    fingerprint = content_fingerprint("ana@bcon.ro", "mesaj")
+
+    async def run():
+        await dedup.claim(fingerprint, {"id": "m-1"}, "key-1")
+        await dedup.release(fingerprint, {"id": "m-1"}, "key-1")
+        return await dedup.claim(fingerprint, {"id": "m-2"}, "key-1")
+
+    assert asyncio.run(run()) is None
+    assert {doc["payload"]["id"] for doc in dedup.collection.docs} == {"m-2"}
+
+
+def test_expired_claim_not_yet_removed_by_ttl_counts_as_free():
+    dedup = make_dedup()
+    fingerprint = content_fingerprint("ana@bcon.ro", "mesaj")
+    asyncio.run(dedup.claim(fingerprint, {"id": "m-1"}))
+    for doc in dedup.collection.docs:
+        doc["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+    assert asyncio.run(dedup.claim(fingerprint, {"id": "m-2"})) is None
+    assert [doc["payload"]["id"] for doc in dedup.collection.docs] == ["m-2"]
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.contact_messages = FakeCollection()
+
+
+CONTACT = {"name": "Ana Pop", "email": "ana@bcon.ro", "message": "Aș dori o ofertă pentru audit."}
+
+
+@pytest.fixture
+def contact_app(monkeypatch, server_client):
+    database, dedup = FakeDatabase(), make_dedup()
+    outbox = EmailOutbox(FakeCollection(), FakeTransport())
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "contact_dedup", dedup)
+    monkeypatch.setattr(server, "email_outbox", outbox)
+    return server_client, database, dedup, outbox
+
+
+def test_repeated_contact_returns_the_original_without_writing(contact_app):
+    client, database, _, outbox = contact_app
+
+    first = client.post("/api/contact", json=CONTACT)
+    repeat = client.post("/api/contact", json={**CONTACT, "message": "  aș dori o OFERTĂ pentru audit. "})
+
+    assert repeat.status_code == 200
+    assert repeat.json() == first.json()
+    assert [doc["notification"]["status"] for doc in database.contact_messages.docs] == ["pending"]
+
+
+def test_reused_idempotency_key_is_a_422(contact_app):
+    client, database, _, _ = contact_app
+    headers = {"Idempotency-Key": "form-123"}
+
+    assert client.post("/api/contact", json=CONTACT, headers=headers).status_code == 200
+    response = client.post("/api/contact", json={**CONTACT, "message": "Alt mesaj, complet diferit."}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(database.contact_messages.docs) == 1
+
+
+def test_dedup_outage_accepts_the_message(contact_app):
+    client, database, dedup, outbox = contact_app
+    dedup.collection.fail = RuntimeError("Mongo unavailable")
+
+    response = client.post("/api/contact", json=CONTACT)
+
+    assert response.status_code == 200
+    assert [doc["notification"]["status"] for doc in database.contact_messages.docs] == ["pending"]
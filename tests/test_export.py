@@ -0,0 +1,36 @@
+"""
+CSV export: formula injection is neutralised without mangling phone numbers.
+"""
+
+import asyncio
+import csv
+import io
+
+from export import iter_csv
+from tests.fake_mongo import FakeCursor
+
+
+class Cursor(FakeCursor):
+    def batch_size(self, n):
+        return self
+
+
+def export(rows, fields):
+    async def collect():
+        return b"".join([chunk async for chunk in iter_csv(Cursor(rows), fields)])
+    text = asyncio.run(collect()).decode().lstrip("﻿")
+    return list(csv.reader(io.StringIO(text)))[1:]
+
+
+def test_phone_numbers_are_exported_unchanged():
+    rows = [{"phone": "+40 721 123 456"}, {"phone": "+40(21)555-01-02"}, {"phone": "-"}]
+
+    assert export(rows, ["phone"]) == [["+40 721 123 456"], ["+40(21)555-01-02"], ["-"]]
+
+
+def test_formulas_are_escaped_in_every_column():
+    rows = [{"name": "=HYPERLINK(\"http://x\")", "phone": "+1+cmd|' /C calc'!A0", "message": "@SUM(A1)"}]
+
+    assert export(rows, ["name", "phone", "message"]) == [
+        ["'=HYPERLINK(\"http://x\")", "'+1+cmd|' /C calc'!A0", "'@SUM(A1)"]
+    ]
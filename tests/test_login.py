@@ -0,0 +1,33 @@
+"""
+Admin login: upgrading an outdated bcrypt hash never fails a correct login.
+"""
+
+import bcrypt
+
+import server
+from passwords import PasswordPoolBusy
+from tests.fake_mongo import FakeCollection
+
+
+class FakeDatabase:
+    def __init__(self, users):
+        self.admin_users = FakeCollection(users)
+
+
+def test_busy_pool_skips_the_rehash_but_logs_in(monkeypatch, server_client):
+    old_hash = bcrypt.hashpw(b"parola-buna", bcrypt.gensalt(rounds=4)).decode()
+    database = FakeDatabase([{"id": "admin-1", "email": "admin@bcon.ro", "name": "Admin",
+                              "password_hash": old_hash, "token_epoch": 0}])
+    monkeypatch.setattr(server, "db", database)
+
+    async def busy(password):
+        raise PasswordPoolBusy()
+    monkeypatch.setattr(server.password_hasher, "hash", busy)
+
+    response = server_client.post(
+        "/api/admin/login", json={"email": "admin@bcon.ro", "password": "parola-buna"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+    assert database.admin_users.docs[0]["password_hash"] == old_hash
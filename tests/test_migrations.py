@@ -0,0 +1,60 @@
+"""
+Migration claims: one worker applies each version, kept alive by its heartbeat.
+"""
+
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import migrations
+from migrations import MIGRATIONS_COLLECTION, Migration, run_migrations
+from tests.fake_mongo import FakeCollection
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def slow_migration(monkeypatch):
+    monkeypatch.setattr(migrations, "HEARTBEAT_INTERVAL", timedelta(seconds=0.01))
+    monkeypatch.setattr(migrations, "STALE_CLAIM_AFTER", timedelta(seconds=0.05))
+    monkeypatch.setattr(migrations, "WAIT_POLL_SECONDS", 0.01)
+    calls = []
+
+    async def apply(db):
+        calls.append(1)
+        # Many times longer than STALE_CLAIM_AFTER
+        await asyncio.sleep(0.3)
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [Migration(1, "Slow index build", apply)])
+    return calls
+
+
+def test_long_migration_is_not_taken_over_while_its_worker_is_alive(slow_migration):
+    db = FakeDatabase()
+
+    async def run():
+        return await asyncio.gather(run_migrations(db), run_migrations(db))
+
+    assert sorted(asyncio.run(run())) == [[], [1]]
+    assert len(slow_migration) == 1
+    assert db[MIGRATIONS_COLLECTION].docs[0]["status"] == "applied"
+
+
+@pytest.mark.parametrize("claim", [
+    {"owner": "crashed-worker", "heartbeat_at": datetime.now(timezone.utc) - timedelta(minutes=5)},
+    # Claims from before heartbeats existed
+    {"started_at": datetime.now(timezone.utc) - timedelta(minutes=5)},
+])
+def test_claim_without_a_recent_heartbeat_is_taken_over(slow_migration, claim):
+    db = FakeDatabase()
+    db[MIGRATIONS_COLLECTION].docs.append({"_id": 1, "status": "running", **claim})
+
+    assert asyncio.run(run_migrations(db)) == [1]
+    assert len(slow_migration) == 1
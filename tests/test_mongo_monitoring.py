@@ -0,0 +1,61 @@
+"""
+MongoDB command monitoring: durations, slow-query log and per-request DB time.
+"""
+
+import logging
+from types import SimpleNamespace
+
+from mongo_monitoring import CommandMonitor, RequestDbTime, query_shape, request_db_time
+
+
+def run_command(monitor, command, micros, request_id=1, failed=False):
+    command_name = next(iter(command))
+    monitor.started(SimpleNamespace(command_name=command_name, command=command,
+                                    request_id=request_id, connection_id=("localhost", 27017)))
+    finished = SimpleNamespace(request_id=request_id, connection_id=("localhost", 27017), duration_micros=micros)
+    (monitor.failed if failed else monitor.succeeded)(finished)
+
+
+def test_query_shape_blanks_values_but_keeps_structure():
+    query = {"published": True, "$or": [{"created_at": {"$lt": 1}}, {"id": {"$in": ["a", "b"]}}]}
+
+    assert query_shape(query) == {
+        "published": "?",
+        "$or": [{"created_at": {"$lt": "?"}}, {"id": {"$in": "?"}}],
+    }
+
+
+def test_durations_are_recorded_by_collection_and_command():
+    monitor = CommandMonitor()
+    run_command(monitor, {"find": "blog_posts", "filter": {"slug": "x"}}, 800)
+    run_command(monitor, {"update": "contact_messages", "updates": [{"q": {"id": "1"}}]}, 500, failed=True)
+    run_command(monitor, {"hello": 1}, 100)
+
+    assert monitor.durations[("blog_posts", "find")].count == 1
+    assert monitor.failures[("contact_messages", "update")] == 1
+    assert ("-", "hello") not in monitor.durations
+
+
+def test_slow_commands_are_logged_with_filter_shape(caplog):
+    monitor = CommandMonitor(slow_threshold_ms=10)
+    with caplog.at_level(logging.WARNING, logger="mongo_monitoring"):
+        run_command(monitor, {"find": "blog_posts", "filter": {"slug": "secret-slug"}}, 25000)
+        run_command(monitor, {"find": "blog_posts", "filter": {"slug": "fast"}}, 2000, request_id=2)
+
+    assert monitor.slow_commands == 1
+    assert 'Slow MongoDB find on blog_posts: 25.0 ms, filter {"slug": "?"}' in caplog.text
+    assert "secret-slug" not in caplog.text
+
+
+def test_command_time_is_added_to_the_current_request():
+    monitor = CommandMonitor()
+    timer = RequestDbTime()
+    token = request_db_time.set(timer)
+    try:
+        run_command(monitor, {"find": "blog_posts", "filter": {}}, 1500)
+        run_command(monitor, {"count": "blog_posts", "query": {}}, 500, request_id=2)
+    finally:
+        request_db_time.reset(token)
+
+    assert timer.commands == 2
+    assert abs(timer.seconds - 0.002) < 1e-9
@@ -0,0 +1,215 @@
+"""
+Email outbox: retries with backoff, dead letters, lease recovery, and contact
+notifications stored with the message and swept into the outbox.
+"""
+
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from outbox import DEAD, PENDING, SENDING, SENT, EmailOutbox, FakeTransport
+from tests.fake_mongo import FakeCollection
+
+MESSAGE = {"from": "site@bcon.ro", "to": ["contact@bcon.ro"], "subject": "Mesaj nou", "html": "<p>Salut</p>"}
+
+
+def make_outbox(fail_times=0, **options):
+    transport = FakeTransport(fail_times=fail_times)
+    return EmailOutbox(FakeCollection(), transport, base_delay=5.0, **options), transport
+
+
+def make_due(outbox):
+    """Pretend the backoff has elapsed."""
+    for doc in outbox.collection.docs:
+        doc["next_attempt_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+
+def test_message_is_sent_once():
+    outbox, transport = make_outbox()
+
+    async def run():
+        await outbox.enqueue(MESSAGE, contact_id="c-1")
+        return await outbox.drain(), await outbox.drain()
+
+    assert asyncio.run(run()) == (1, 0)
+    assert transport.sent == [MESSAGE]
+    doc = outbox.collection.docs[0]
+    assert doc["status"] == SENT
+    assert doc["attempts"] == 1
+    assert doc["contact_id"] == "c-1"
+
+
+def test_failed_sends_back_off_exponentially_then_succeed():
+    outbox, transport = make_outbox(fail_times=2)
+    delays = []
+
+    async def run():
+        await outbox.enqueue(MESSAGE)
+        for _ in range(3):
+            await outbox.drain()
+            doc = outbox.collection.docs[0]
+            if doc["status"] == PENDING:
+                delays.append((doc["next_attempt_at"] - doc["updated_at"]).total_seconds())
+                # Not due yet: the next drain leaves it alone
+                assert await outbox.drain() == 0
+                make_due(outbox)
+
+    asyncio.run(run())
+
+    assert delays == [5.0, 10.0]
+    doc = outbox.collection.docs[0]
+    assert doc["status"] == SENT
+    assert doc["attempts"] == 3
+    assert transport.sent == [MESSAGE]
+
+
+def test_message_is_dead_after_max_attempts():
+    outbox, transport = make_outbox(fail_times=10, max_attempts=3)
+
+    async def run():
+        await outbox.enqueue(MESSAGE)
+        for _ in range(3):
+            await outbox.drain()
+            make_due(outbox)
+        return await outbox.drain()
+
+    assert asyncio.run(run()) == 0
+    doc = outbox.collection.docs[0]
+    assert doc["status"] == DEAD
+    assert doc["attempts"] == 3
+    assert doc["last_error"] == "Simulated transport failure"
+    assert transport.sent == []
+
+
+def test_expired_lease_is_reclaimed():
+    outbox, transport = make_outbox()
+    now = datetime.now(timezone.utc)
+    crashed = outbox.new_message(MESSAGE, status=SENDING, attempts=1, locked_until=now - timedelta(seconds=1))
+    held = outbox.new_message(MESSAGE, status=SENDING, attempts=1, locked_until=now + timedelta(minutes=2))
+    outbox.collection.docs += [crashed, held]
+
+    assert asyncio.run(outbox.drain()) == 1
+    statuses = {doc["id"]: doc["status"] for doc in outbox.collection.docs}
+    assert statuses == {crashed["id"]: SENT, held["id"]: SENDING}
+    assert len(transport.sent) == 1
+
+
+class SlowTransport(FakeTransport):
+    async def send(self, message: dict) -> None:
+        await asyncio.sleep(0.05)
+        await super().send(message)
+
+
+def test_stop_waits_for_sends_in_flight():
+    transport = SlowTransport()
+    outbox = EmailOutbox(FakeCollection(), transport, poll_interval=60.0)
+
+    async def run():
+        outbox.start()
+        await outbox.enqueue(MESSAGE)
+        while not outbox._in_flight:
+            await asyncio.sleep(0.001)
+        await outbox.stop()
+
+    asyncio.run(run())
+
+    assert transport.sent == [MESSAGE]
+    assert outbox.collection.docs[0]["status"] == SENT
+
+
+class FakeDeduplicator:
+    def __init__(self):
+        self.released = 0
+
+    async def claim(self, fingerprint, payload, idempotency_key=None):
+        return None
+
+    async def release(self, fingerprint, payload, idempotency_key=None):
+        self.released += 1
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.contact_messages = FakeCollection()
+
+
+CONTACT = {"name": "Ana Pop", "email": "ana@bcon.ro", "message": "Aș dori o ofertă pentru audit."}
+
+
+@pytest.fixture
+def contact_app(monkeypatch, server_client):
+    database, dedup = FakeDatabase(), FakeDeduplicator()
+    outbox, transport = make_outbox()
+    outbox.watch(database.contact_messages, server.contact_notification, "contact_id")
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "contact_dedup", dedup)
+    monkeypatch.setattr(server, "email_outbox", outbox)
+    # Server errors come back as 500 responses instead of being raised into the test
+    return TestClient(server.app, raise_server_exceptions=False), database, dedup, outbox, transport
+
+
+def notification_statuses(database):
+    return [doc["notification"]["status"] for doc in database.contact_messages.docs]
+
+
+def test_contact_notification_is_stored_with_the_message_and_sent(contact_app):
+    client, database, dedup, outbox, transport = contact_app
+
+    response = client.post("/api/contact", json=CONTACT)
+
+    assert response.status_code == 200
+    assert [doc["id"] for doc in database.contact_messages.docs] == [response.json()["id"]]
+    assert notification_statuses(database) == ["pending"]
+    assert outbox.collection.docs == []
+
+    assert asyncio.run(outbox.sweep()) == 1
+    assert asyncio.run(outbox.drain()) == 1
+    assert notification_statuses(database) == ["queued"]
+    assert [doc["contact_id"] for doc in outbox.collection.docs] == [response.json()["id"]]
+    assert [message["subject"] for message in transport.sent] == ["Mesaj nou de la Ana Pop - B-CON Website"]
+    assert asyncio.run(outbox.sweep()) == 0
+
+
+def test_notification_survives_an_outbox_outage(contact_app):
+    client, database, dedup, outbox, transport = contact_app
+    outbox.collection.fail = RuntimeError("Mongo unavailable")
+
+    assert client.post("/api/contact", json=CONTACT).status_code == 200
+    with pytest.raises(RuntimeError):
+        asyncio.run(outbox.sweep())
+    assert notification_statuses(database) == ["pending"]
+
+    outbox.collection.fail = None
+    asyncio.run(outbox.sweep())
+    asyncio.run(outbox.drain())
+
+    assert len(transport.sent) == 1
+    assert notification_statuses(database) == ["queued"]
+
+
+def test_interrupted_sweep_does_not_queue_twice(contact_app):
+    client, database, dedup, outbox, transport = contact_app
+    client.post("/api/contact", json=CONTACT)
+    asyncio.run(outbox.sweep())
+    # As if the worker died between queueing the message and marking the contact
+    database.contact_messages.docs[0]["notification"]["status"] = "pending"
+
+    assert asyncio.run(outbox.sweep()) == 0
+    assert len(outbox.collection.docs) == 1
+    assert notification_statuses(database) == ["queued"]
+
+
+def test_failed_contact_insert_queues_nothing(contact_app):
+    client, database, dedup, outbox, transport = contact_app
+    database.contact_messages.fail = RuntimeError("Mongo unavailable")
+
+    response = client.post("/api/contact", json=CONTACT)
+
+    assert response.status_code == 500
+    assert dedup.released == 1
+    database.contact_messages.fail = None
+    assert asyncio.run(outbox.sweep()) == 0
+    assert outbox.collection.docs == []
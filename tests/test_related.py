@@ -0,0 +1,64 @@
+"""
+Related posts: TF-IDF similarity between published posts, and the background job.
+"""
+
+import asyncio
+
+from mongo_monitoring import RequestDbTime, request_db_time
+from related import RelatedPostsJob, compute_related
+from timing import ServerTiming, current_timing
+
+
+def post(post_id, title, content_text):
+    return {"id": post_id, "slug": f"{post_id}-slug", "title": title, "category": "",
+            "excerpt": "", "content_text": content_text}
+
+
+POSTS = [
+    post("tva", "Declarația de TVA", "deducere TVA facturi declarație lunară"),
+    post("tva2", "Rambursarea TVA", "rambursare TVA facturi control fiscal"),
+    post("sal", "Salarizare", "salarii contracte de muncă angajați"),
+    post("sal2", "Concedii și salarii", "concedii de odihnă salarii angajați"),
+]
+
+
+def test_most_similar_post_comes_first():
+    related = compute_related(POSTS, k=3)
+
+    assert related["tva"][0] == "tva2-slug"
+    assert related["sal"][0] == "sal2-slug"
+    assert "tva-slug" not in related["tva"]
+
+
+def test_dissimilar_posts_are_not_recommended():
+    related = compute_related(POSTS, k=3)
+
+    assert related["tva"] == ["tva2-slug"]
+
+
+def test_k_limits_the_list_and_single_post_has_none():
+    audits = [post(f"audit{i}", "Audit financiar", f"raport anual de audit {i}") for i in range(4)]
+
+    assert len(compute_related(POSTS + audits, k=2)["audit0"]) == 2
+    assert compute_related(POSTS[:1], k=3) == {"tva": []}
+
+
+class RecordingJob(RelatedPostsJob):
+    async def run_once(self):
+        self.seen = (request_db_time.get(), current_timing.get())
+        return 0
+
+
+def test_triggered_job_does_not_inherit_the_request_context():
+    job = RecordingJob(collection=None)
+
+    async def request():
+        # What the middlewares have set while a route handler calls trigger()
+        request_db_time.set(RequestDbTime())
+        current_timing.set(ServerTiming())
+        job.trigger()
+        await job.wait()
+
+    asyncio.run(request())
+
+    assert job.seen == (None, None)
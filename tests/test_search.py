@@ -0,0 +1,75 @@
+"""
+Blog search index: diacritic folding, ranking and incremental updates.
+"""
+
+import asyncio
+
+from search import SearchIndex, fold, strip_html
+
+SUMMARY_FIELDS = ["id", "title", "slug"]
+
+
+def post(post_id, title, content="", **extra):
+    return {"id": post_id, "title": title, "slug": post_id, "excerpt": "", "content": content, **extra}
+
+
+def ids(results):
+    return [summary["id"] for summary, _ in results]
+
+
+def test_fold_handles_comma_and_cedilla_diacritics():
+    assert fold("Ședință ŞEDINŢĂ învăță") == "sedinta sedinta invata"
+
+
+def test_strip_html_drops_tags_and_scripts():
+    html = "<h2>Titlu</h2><p>Text <b>important</b></p><script>var x = 1;</script>"
+    assert strip_html(html) == "Titlu Text important"
+
+
+def test_search_matches_without_diacritics_and_ranks_title_first():
+    index = SearchIndex(SUMMARY_FIELDS)
+    index.add(post("a", "Noutăți fiscale", "<p>Despre impozitul pe profit</p>"))
+    index.add(post("b", "Impozitul pe profit în 2024", "<p>Ce se schimbă</p>"))
+    index.add(post("c", "Contabilitate", "<p>Nimic relevant</p>"))
+
+    assert ids(index.search("impozitul")) == ["b", "a"]
+    assert ids(index.search("noutati")) == ["a"]
+
+
+def test_last_word_matches_as_prefix():
+    index = SearchIndex(SUMMARY_FIELDS)
+    index.add(post("a", "Contabilitate primară"))
+
+    assert ids(index.search("contab")) == ["a"]
+    assert index.search("co") == []
+
+
+def test_updates_and_removals_apply_incrementally():
+    index = SearchIndex(SUMMARY_FIELDS)
+    index.add(post("a", "Audit financiar"))
+    index.add(post("a", "Salarizare"))
+
+    assert index.search("audit") == []
+    assert ids(index.search("salarizare")) == ["a"]
+
+    index.remove("a")
+    assert index.search("salarizare") == []
+    assert len(index) == 0
+
+
+def test_edits_during_a_reload_survive_it():
+    index = SearchIndex(SUMMARY_FIELDS)
+    index.add(post("old", "Articol vechi despre audit"))
+
+    async def scenario():
+        async def query():
+            # Snapshot read before the admin edits below
+            snapshot = [post("old", "Articol vechi despre audit"), post("gone", "Audit de șters")]
+            index.add(post("new", "Audit nou publicat"))
+            index.remove("gone")
+            await asyncio.sleep(0)
+            return snapshot
+        return await index.reload(query)
+
+    assert asyncio.run(scenario()) == 2
+    assert sorted(ids(index.search("audit"))) == ["new", "old"]
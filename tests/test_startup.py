@@ -0,0 +1,20 @@
+"""
+Application startup: a failed migration must stop the app from serving.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_startup_aborts_when_a_migration_fails(monkeypatch):
+    async def failing_migrations(db):
+        raise RuntimeError("index build failed")
+
+    monkeypatch.setattr(server, "RUN_MIGRATIONS_ON_STARTUP", True)
+    monkeypatch.setattr(server, "run_migrations", failing_migrations)
+
+    with pytest.raises(RuntimeError, match="index build failed"):
+        with TestClient(server.app):
+            pass
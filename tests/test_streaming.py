@@ -0,0 +1,64 @@
+"""
+Streamed admin pages: query errors fail before the status line is sent.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from streaming import stream_page
+
+
+class Cursor:
+    def __init__(self, docs, fail_at=None):
+        self.docs = docs
+        self.fail_at = fail_at
+        self.position = 0
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.position == self.fail_at:
+            raise RuntimeError("Mongo unavailable")
+        if self.position >= len(self.docs):
+            raise StopAsyncIteration
+        self.position += 1
+        return self.docs[self.position - 1]
+
+
+def docs(n):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [{"id": str(i), "created_at": start - timedelta(minutes=i)} for i in range(n)]
+
+
+def body(response):
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return json.loads(asyncio.run(collect()))
+
+
+def test_page_with_a_next_cursor():
+    response = asyncio.run(stream_page(Cursor(docs(3)), limit=2))
+
+    page = body(response)
+    assert [item["id"] for item in page["items"]] == ["0", "1"]
+    assert page["next_cursor"]
+
+
+def test_last_page_spanning_several_batches():
+    response = asyncio.run(stream_page(Cursor(docs(250)), limit=300))
+
+    page = body(response)
+    assert len(page["items"]) == 250
+    assert page["next_cursor"] is None
+
+
+def test_query_error_is_raised_before_the_response_exists():
+    with pytest.raises(RuntimeError):
+        asyncio.run(stream_page(Cursor(docs(3), fail_at=0), limit=2))
@@ -0,0 +1,80 @@
+"""
+Server-Timing header: per-request phases, enabled globally or by admins per request.
+"""
+
+import pytest
+
+import server
+from auth import EpochCache
+from tests.fake_mongo import FakeCollection
+from timing import ServerTimingMiddleware, timed
+
+ADMIN_TOKEN = "admin-token"
+
+
+async def authorize(token):
+    return token == ADMIN_TOKEN
+
+
+@pytest.fixture
+def make_client(middleware_client):
+    def make(always=False):
+        return middleware_client(ServerTimingMiddleware, always=always, authorize=authorize)
+    return make
+
+
+def phases(response):
+    return [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+
+
+def test_off_by_default(make_client):
+    response = make_client().get("/api/dashboard", headers={"Authorization": f"Bearer {ADMIN_TOKEN}"})
+
+    assert "server-timing" not in response.headers
+
+
+def test_admin_can_request_timing(make_client):
+    response = make_client().get(
+        "/api/dashboard", headers={"Authorization": f"Bearer {ADMIN_TOKEN}", "X-Server-Timing": "1"}
+    )
+
+    assert phases(response) == ["auth", "serialize", "total"]
+
+
+def test_header_is_ignored_without_a_valid_admin_token(make_client):
+    client = make_client()
+
+    assert "server-timing" not in client.get("/api/dashboard", headers={"X-Server-Timing": "1"}).headers
+    assert "server-timing" not in client.get(
+        "/api/dashboard", headers={"Authorization": "Bearer forged", "X-Server-Timing": "1"}
+    ).headers
+
+
+def test_enabled_for_everyone_by_env(make_client):
+    response = make_client(always=True).get("/api/dashboard", headers={"Origin": "https://bcon.ro"})
+
+    assert phases(response) == ["auth", "serialize", "total"]
+    assert response.headers["timing-allow-origin"] == "https://bcon.ro"
+
+
+def test_timed_is_a_no_op_outside_a_timed_request():
+    with timed("auth") as block:
+        pass
+
+    assert block.timing is None
+
+
+def test_server_times_admin_requests_that_ask_for_it(server_client, monkeypatch):
+    admin = {"id": "admin-1", "email": "admin@bcon.ro", "name": "Admin", "token_epoch": 0}
+    monkeypatch.setattr(server.token_verifier, "epochs", EpochCache(FakeCollection([admin])))
+    token = server.token_verifier.encode("admin-1", "admin@bcon.ro", "Admin", epoch=0)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert "server-timing" not in server_client.get("/api/admin/me", headers=headers).headers
+    assert "server-timing" not in server_client.get(
+        "/api/admin/me", headers={"Authorization": "Bearer forged", "X-Server-Timing": "1"}
+    ).headers
+    response = server_client.get("/api/admin/me", headers={**headers, "X-Server-Timing": "1"})
+
+    assert response.status_code == 200
+    assert phases(response) == ["auth", "total"]
@@ -0,0 +1,72 @@
+"""
+Write-behind blog view counters.
+"""
+
+import asyncio
+
+from views import ViewCounter
+
+
+class FakeCollection:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.writes = []
+
+    async def bulk_write(self, ops, ordered=True):
+        if self.fail:
+            raise RuntimeError("Mongo unavailable")
+        self.writes.append([(op._filter, op._doc) for op in ops])
+
+
+def test_views_are_flushed_as_one_bulk_write():
+    collection = FakeCollection()
+    counter = ViewCounter(collection)
+    for slug in ("a", "b", "a"):
+        counter.record(slug)
+
+    assert asyncio.run(counter.flush()) == 3
+    assert collection.writes == [[
+        ({"slug": "a"}, {"$inc": {"view_count": 2}}),
+        ({"slug": "b"}, {"$inc": {"view_count": 1}}),
+    ]]
+    assert counter.pending() == 0
+    assert asyncio.run(counter.flush()) == 0
+    assert len(collection.writes) == 1
+
+
+def test_failed_flush_keeps_counts_for_the_next_attempt():
+    collection = FakeCollection(fail=True)
+    counter = ViewCounter(collection)
+    counter.record("a")
+
+    try:
+        asyncio.run(counter.flush())
+    except RuntimeError:
+        pass
+    counter.record("a")
+    collection.fail = False
+
+    assert asyncio.run(counter.flush()) == 2
+    assert counter.stats()["failed_flushes"] == 1
+
+
+def test_stop_drains_pending_views():
+    collection = FakeCollection()
+    counter = ViewCounter(collection, flush_interval=60)
+
+    async def run():
+        counter.start()
+        counter.record("a")
+        await counter.stop()
+
+    asyncio.run(run())
+    assert collection.writes == [[({"slug": "a"}, {"$inc": {"view_count": 1}})]]
+
+
+def test_view_count_stays_out_of_cached_post_payloads():
+    import server
+
+    # A flush would otherwise change the ETag of exactly the posts being read
+    assert "view_count" not in server.BLOG_POST_PROJECTION
+    assert "view_count" not in server.blog_summary_projection(None)
+    assert "view_count" in server.POPULAR_POST_PROJECTION